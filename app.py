@@ -2,16 +2,26 @@ from typing import Optional, Dict, List, Iterable, Union, Annotated, Any, Tuple,
 
 from decimal import Decimal
 
+import gzip
+import hashlib
 import logging
 import os
+import queue
 import secrets
 import re
+import sys
+import threading
+import time
 from types import SimpleNamespace
+from collections import Counter
 from datetime import date, datetime, timedelta
+from functools import lru_cache
 from io import BytesIO
 from urllib.parse import quote, urlencode
 from itertools import zip_longest
 
+import anyio.to_thread
+
 from fastapi import (
     FastAPI,
     Depends,
@@ -23,16 +33,18 @@ from fastapi import (
     status,
 )
 from fastapi.exception_handlers import http_exception_handler
-from fastapi.responses import HTMLResponse, RedirectResponse, Response
+from fastapi.responses import HTMLResponse, ORJSONResponse, RedirectResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from fastapi.security import OAuth2PasswordRequestForm
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from starlette.datastructures import URL
 
-from database import init_db, get_session, engine
+from database import DB_MAX_OVERFLOW, DB_POOL_SIZE, init_db, get_session, engine
 from defaults import DEFAULT_PRESTATION_GROUPS
 from models import (
     BeltLineCreate,
@@ -52,6 +64,7 @@ from models import (
     SubcontractedServiceComment,
     SubcontractedServiceUpdate,
     WorkloadCellUpdate,
+    WorkloadSite,
     WorkloadSiteCreate,
     WorkloadSiteUpdate,
     User,
@@ -70,21 +83,32 @@ from importers import (
     parse_workload_plan_excel,
 )
 from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
 from uuid import uuid4
 from pydantic import BaseModel, Field
 #uvicorn app:app --reload
 
-app = FastAPI(title="CRM Local")
+app = FastAPI(title="CRM Local", default_response_class=ORJSONResponse)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
+templates.env.auto_reload = os.environ.get("CRM_TEMPLATES_AUTO_RELOAD", "true").lower() in {"1", "true", "yes"}
+templates.env.bytecode_cache = FileSystemBytecodeCache(os.environ.get("CRM_TEMPLATES_CACHE_DIR") or None)
 
 logger = logging.getLogger("crm_local.auth")
 
 SECRET_KEY = os.environ.get("CRM_SECRET_KEY", "change-me")
 ALGORITHM = "HS256"
+JWT_DECODE_ALGORITHMS = (ALGORITHM,)
+JWT_DECODE_OPTIONS = {
+    "verify_aud": False,
+    "verify_iss": False,
+    "verify_jti": False,
+    "verify_at_hash": False,
+}
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("CRM_TOKEN_EXPIRE_MINUTES", "480"))
 DEFAULT_ADMIN_USERNAME = os.environ.get("CRM_ADMIN_USERNAME", "admin")
 DEFAULT_ADMIN_PASSWORD = os.environ.get("CRM_ADMIN_PASSWORD", "admin")
+ADMIN_USERNAMES = frozenset({DEFAULT_ADMIN_USERNAME})
 
 templates.env.globals["ADMIN_USERNAME"] = DEFAULT_ADMIN_USERNAME
 
@@ -94,8 +118,24 @@ PASSWORD_MIN_LENGTH = 8
 SESSION_COOKIE_NAME = os.environ.get("CRM_SESSION_COOKIE_NAME", "session_token")
 SESSION_COOKIE_SECURE = os.environ.get("CRM_SESSION_COOKIE_SECURE", "false").lower() in {"1", "true", "yes"}
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
+WORKER_THREADS = int(
+    os.environ.get("CRM_WORKER_THREADS", str(DB_POOL_SIZE + DB_MAX_OVERFLOW))
+)
+
+TOKEN_CACHE_TTL_SECONDS = 30
+TOKEN_CACHE_MAX_ENTRIES = 10000
+USER_ACTIVITY_TOUCH_INTERVAL = timedelta(seconds=60)
+LOGIN_MAX_FAILED_ATTEMPTS = 5
+LOGIN_FAILURE_WINDOW_SECONDS = 60
+LOGIN_THROTTLE_MAX_ENTRIES = 10000
+LOGIN_THROTTLE_MESSAGE = "Trop de tentatives de connexion. Réessayez dans une minute."
+
+BCRYPT_ROUNDS = int(os.environ.get("CRM_BCRYPT_ROUNDS", "12"))
+TEMPORARY_PASSWORD_POOL_SIZE = 4
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS
+)
 
 
 def _generate_temporary_password(length: int = 12) -> str:
@@ -127,9 +167,96 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+@lru_cache(maxsize=1)
+def _dummy_password_hash() -> str:
+    return pwd_context.hash(secrets.token_urlsafe(16))
+
+
+# Mots de passe temporaires pré-hachés pour les réinitialisations admin.
+_temporary_passwords: "queue.Queue[Tuple[str, str]]" = queue.Queue(
+    maxsize=TEMPORARY_PASSWORD_POOL_SIZE
+)
+_temporary_passwords_worker: Optional[threading.Thread] = None
+_temporary_passwords_stop = threading.Event()
+
+
+def _new_temporary_password() -> Tuple[str, str]:
+    temporary_password = _generate_temporary_password()
+    return temporary_password, get_password_hash(temporary_password)
+
+
+def _fill_temporary_passwords() -> None:
+    while not _temporary_passwords_stop.is_set():
+        pair = _new_temporary_password()
+        while not _temporary_passwords_stop.is_set():
+            try:
+                _temporary_passwords.put(pair, timeout=1)
+                break
+            except queue.Full:
+                continue
+
+
+def _start_temporary_passwords_worker() -> None:
+    global _temporary_passwords_worker
+    if _temporary_passwords_worker and _temporary_passwords_worker.is_alive():
+        return
+    _temporary_passwords_stop.clear()
+    _temporary_passwords_worker = threading.Thread(
+        target=_fill_temporary_passwords,
+        name="temporary-passwords",
+        daemon=True,
+    )
+    _temporary_passwords_worker.start()
+
+
+def _stop_temporary_passwords_worker() -> None:
+    global _temporary_passwords_worker
+    _temporary_passwords_stop.set()
+    if _temporary_passwords_worker:
+        # Attendre la fin du hachage en cours avant l'arrêt de l'interpréteur.
+        _temporary_passwords_worker.join()
+        _temporary_passwords_worker = None
+
+
+def _take_temporary_password() -> Tuple[str, str]:
+    try:
+        return _temporary_passwords.get_nowait()
+    except queue.Empty:
+        return _new_temporary_password()
+
+
+_failed_logins: Dict[str, Tuple[int, float]] = {}
+_failed_logins_lock = threading.Lock()
+
+
+def _login_throttled(username: str) -> bool:
+    attempts, window_start = _failed_logins.get(username, (0, 0.0))
+    return (
+        attempts >= LOGIN_MAX_FAILED_ATTEMPTS
+        and time.monotonic() - window_start < LOGIN_FAILURE_WINDOW_SECONDS
+    )
+
+
+def _record_login_result(username: str, succeeded: bool) -> None:
+    with _failed_logins_lock:
+        if succeeded:
+            _failed_logins.pop(username, None)
+            return
+        now = time.monotonic()
+        if len(_failed_logins) >= LOGIN_THROTTLE_MAX_ENTRIES:
+            for key, (_, started) in list(_failed_logins.items()):
+                if now - started >= LOGIN_FAILURE_WINDOW_SECONDS:
+                    del _failed_logins[key]
+        attempts, window_start = _failed_logins.get(username, (0, now))
+        if now - window_start >= LOGIN_FAILURE_WINDOW_SECONDS:
+            attempts, window_start = 0, now
+        _failed_logins[username] = (attempts + 1, window_start)
+
+
 def authenticate_user(session: Session, username: str, password: str) -> Optional[User]:
     user = crud.get_user_by_username(session, username)
     if not user:
+        verify_password(password, _dummy_password_hash())
         return None
     if not verify_password(password, user.hashed_password):
         return None
@@ -141,18 +268,17 @@ def create_access_token(
     expires_delta: Optional[timedelta] = None,
 ) -> str:
     to_encode = data.copy()
-    expire = datetime.utcnow() + (
-        expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    )
-    to_encode.update({"exp": expire})
+    lifetime = expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode["exp"] = int(time.time() + lifetime.total_seconds())
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def get_token_from_request(
-    request: Request, token: Optional[str] = Depends(oauth2_scheme)
-) -> str:
-    if token:
-        return token
+def get_token_from_request(request: Request) -> str:
+    authorization = request.headers.get("authorization")
+    if authorization:
+        scheme, _, token = authorization.partition(" ")
+        if token and scheme.lower() == "bearer":
+            return token
     cookie_token = request.cookies.get(SESSION_COOKIE_NAME)
     if cookie_token:
         return cookie_token
@@ -178,6 +304,42 @@ async def redirect_unauthenticated_users(
     return await http_exception_handler(request, exc)
 
 
+_token_cache: Dict[bytes, Tuple[float, str]] = {}
+_token_cache_lock = threading.Lock()
+
+
+def _decode_token_subject(token: str) -> Optional[str]:
+    key = hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+    now = time.monotonic()
+    cached = _token_cache.get(key)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    payload = jwt.decode(
+        token,
+        SECRET_KEY,
+        algorithms=JWT_DECODE_ALGORITHMS,
+        options=JWT_DECODE_OPTIONS,
+    )
+    username: Optional[str] = payload.get("sub")
+    if username is None:
+        return None
+
+    valid_until = now + TOKEN_CACHE_TTL_SECONDS
+    expires_at = payload.get("exp")
+    if isinstance(expires_at, (int, float)):
+        valid_until = min(valid_until, now + expires_at - time.time())
+    with _token_cache_lock:
+        if len(_token_cache) >= TOKEN_CACHE_MAX_ENTRIES:
+            for cached_key, (cached_until, _) in list(_token_cache.items()):
+                if cached_until <= now:
+                    del _token_cache[cached_key]
+            if len(_token_cache) >= TOKEN_CACHE_MAX_ENTRIES:
+                _token_cache.clear()
+        _token_cache[key] = (valid_until, username)
+    return username
+
+
 def get_current_user(
     request: Request,
     token: str = Depends(get_token_from_request),
@@ -189,8 +351,7 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: Optional[str] = payload.get("sub")
+        username = _decode_token_subject(token)
         if username is None:
             raise credentials_exception
         token_data = TokenData(username=username)
@@ -199,7 +360,12 @@ def get_current_user(
     user = crud.get_user_by_username(session, token_data.username or "")
     if not user:
         raise credentials_exception
-    crud.touch_user_activity(session, user)
+    if (
+        not user.is_online
+        or user.last_active_at is None
+        or datetime.utcnow() - user.last_active_at >= USER_ACTIVITY_TOUCH_INTERVAL
+    ):
+        crud.touch_user_activity(session, user)
     request.state.user = user
     return user
 
@@ -225,21 +391,36 @@ def _ensure_default_admin_user() -> None:
                 "Le mot de passe administrateur par défaut dépasse la limite de 72 octets imposée par bcrypt. "
                 "Veuillez définir CRM_ADMIN_PASSWORD avec une valeur plus courte."
             ) from exc
-        crud.create_user(
-            session,
-            UserCreate(username=DEFAULT_ADMIN_USERNAME, hashed_password=hashed_password),
-        )
+        try:
+            crud.create_user(
+                session,
+                UserCreate(
+                    username=DEFAULT_ADMIN_USERNAME, hashed_password=hashed_password
+                ),
+            )
+        except IntegrityError:
+            # Un autre worker a créé le compte entre-temps.
+            session.rollback()
+            return
         logger.info(
             "Utilisateur administrateur '%s' initialisé.", DEFAULT_ADMIN_USERNAME
         )
 
 
-def _ensure_admin_access(user: User) -> None:
-    if user.username != DEFAULT_ADMIN_USERNAME:
+def _is_admin(user: User) -> bool:
+    return user.username in ADMIN_USERNAMES
+
+
+def get_current_admin_user(current_user: CurrentUser) -> User:
+    if not _is_admin(current_user):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Accès réservé à l'administrateur.",
         )
+    return current_user
+
+
+AdminUser = Annotated[User, Depends(get_current_admin_user)]
 
 
 DEPANNAGE_OPTIONS = {
@@ -284,25 +465,27 @@ SUBCONTRACT_STATUS_STYLES = {
     "non_commence": "border-rose-200 bg-rose-50 text-rose-700 dark:border-rose-400/40 dark:bg-rose-500/10 dark:text-rose-100",
 }
 
-SUBCONTRACT_STATUS_FILTER_OPTIONS = [
+SUBCONTRACT_STATUS_FILTER_OPTIONS = (
     ("non_commence", "Non commencé"),
     ("en_cours", "En cours"),
     ("fait", "Fait"),
-]
-SUBCONTRACT_STATUS_FILTER_KEYS = {value for value, _ in SUBCONTRACT_STATUS_FILTER_OPTIONS}
+)
+SUBCONTRACT_STATUS_FILTER_KEYS = frozenset(value for value, _ in SUBCONTRACT_STATUS_FILTER_OPTIONS)
 
-ORDER_STATUS_FILTER_OPTIONS = [("overdue", "Commandes en retard")]
-ORDER_STATUS_FILTER_KEYS = {value for value, _ in ORDER_STATUS_FILTER_OPTIONS}
+ORDER_STATUS_FILTER_OPTIONS = (("overdue", "Commandes en retard"),)
+ORDER_STATUS_FILTER_KEYS = frozenset(value for value, _ in ORDER_STATUS_FILTER_OPTIONS)
 
-FILTER_FORMAT_OPTIONS = [
+FILTER_FORMAT_OPTIONS = (
     ("cousus_sur_fil", "Cousus sur fil"),
     ("cadre", "Format cadre"),
     ("multi_diedre", "Format multi dièdre"),
     ("poche", "Format poche"),
-]
+)
 FILTER_FORMAT_LABELS = {value: label for value, label in FILTER_FORMAT_OPTIONS}
 
 ALLOWED_IMPORT_EXTENSIONS = (".xlsx", ".xlsm", ".xltx", ".xltm")
+IMPORT_BATCH_SIZE = 500
+IMPORT_REPORT_MAX_ERRORS = 500
 
 
 def _status_to_bool(value: Optional[str]) -> Optional[bool]:
@@ -364,11 +547,8 @@ def _consume_import_report(request: Request):
     report_token = request.query_params.get("report")
     if not report_token:
         return None
-    reports = getattr(app.state, "import_reports", None)
-    if reports is None:
-        reports = {}
-        app.state.import_reports = reports
-    return reports.pop(report_token, None)
+    with Session(engine) as session:
+        return crud.pop_import_report(session, report_token)
 
 
 def _store_import_report(
@@ -381,50 +561,177 @@ def _store_import_report(
     singular_label: str,
     plural_label: str,
 ) -> RedirectResponse:
+    if len(errors) > IMPORT_REPORT_MAX_ERRORS:
+        hidden = len(errors) - IMPORT_REPORT_MAX_ERRORS
+        errors = errors[:IMPORT_REPORT_MAX_ERRORS] + [
+            f"… et {hidden} autre(s) erreur(s) non affichée(s)."
+        ]
     report_id = uuid4().hex
-    reports = getattr(app.state, "import_reports", None)
-    if reports is None:
-        reports = {}
-        app.state.import_reports = reports
-    reports[report_id] = {
-        "created": created,
-        "errors": errors,
-        "total": total,
-        "filename": filename,
-        "entity_label": singular_label,
-        "entity_label_plural": plural_label,
-    }
+    with Session(engine) as session:
+        crud.store_import_report(
+            session,
+            report_id,
+            {
+                "created": created,
+                "errors": errors,
+                "total": total,
+                "filename": filename,
+                "entity_label": singular_label,
+                "entity_label_plural": plural_label,
+            },
+        )
     return RedirectResponse(url=f"{redirect_url}?report={report_id}", status_code=303)
 
+
+def _import_error(
+    redirect_url: str,
+    filename: str,
+    message: str,
+    singular_label: str,
+    plural_label: str,
+) -> RedirectResponse:
+    return _store_import_report(
+        redirect_url,
+        created=0,
+        total=0,
+        errors=[message],
+        filename=filename,
+        singular_label=singular_label,
+        plural_label=plural_label,
+    )
+
+
+def _invalid_import_file_message(file: UploadFile) -> Optional[str]:
+    if not file.filename:
+        return "Aucun fichier sélectionné."
+    if not file.filename.lower().endswith(ALLOWED_IMPORT_EXTENSIONS):
+        return "Format de fichier non supporté. Merci d'utiliser un fichier Excel (.xlsx)."
+    return None
+
+
+def _reject_import_file(
+    file: UploadFile,
+    redirect_url: str,
+    default_filename: str,
+    singular_label: str,
+    plural_label: str,
+) -> Optional[RedirectResponse]:
+    message = _invalid_import_file_message(file)
+    if message is None:
+        return None
+    return _import_error(
+        redirect_url,
+        file.filename or default_filename,
+        message,
+        singular_label,
+        plural_label,
+    )
+
+
+def _insert_import_batches(
+    session: Session,
+    entries: Sequence[Tuple[Any, Any]],
+    bulk_create,
+    errors: List[str],
+) -> int:
+    created = 0
+    for start in range(0, len(entries), IMPORT_BATCH_SIZE):
+        batch = entries[start : start + IMPORT_BATCH_SIZE]
+        try:
+            with session.begin_nested():
+                created += bulk_create(session, [item for _, item in batch])
+            continue
+        except Exception:
+            pass
+        for row_number, item in batch:
+            try:
+                with session.begin_nested():
+                    created += bulk_create(session, [item])
+            except Exception as exc:
+                errors.append(f"Ligne {row_number} : {exc}")
+    session.commit()
+    return created
+
+
+def _import_model_rows(
+    session: Session,
+    file: UploadFile,
+    *,
+    redirect_url: str,
+    default_filename: str,
+    singular_label: str,
+    plural_label: str,
+    parser,
+    model,
+    bulk_create,
+) -> RedirectResponse:
+    rejection = _reject_import_file(
+        file, redirect_url, default_filename, singular_label, plural_label
+    )
+    if rejection:
+        return rejection
+
+    errors: List[str] = []
+    entries: List[Tuple[Any, Any]] = []
+    total = 0
+    try:
+        for total, row in enumerate(parser(file.file), start=1):
+            payload = {
+                key: value
+                for key, value in row.items()
+                if not key.startswith("__")
+            }
+            row_number = row.get("__row__", total)
+            try:
+                entries.append((row_number, model(**payload)))
+            except Exception as exc:
+                errors.append(f"Ligne {row_number} : {exc}")
+    except ValueError as exc:
+        return _import_error(
+            redirect_url, file.filename, str(exc), singular_label, plural_label
+        )
+    created = _insert_import_batches(session, entries, bulk_create, errors)
+
+    return _store_import_report(
+        redirect_url,
+        created=created,
+        total=total,
+        errors=errors,
+        filename=file.filename,
+        singular_label=singular_label,
+        plural_label=plural_label,
+    )
+
+
 CLIENT_FILTER_DEFINITIONS = [
     {
         "name": "status",
         "label": "Statut",
         "placeholder": "Tous les statuts",
-        "options": list(STATUS_OPTIONS.items()),
+        "options": tuple(STATUS_OPTIONS.items()),
     },
     {
         "name": "depannage",
         "label": "Dépannage",
         "placeholder": "Tous les dépannages",
-        "options": list(DEPANNAGE_OPTIONS.items()),
+        "options": tuple(DEPANNAGE_OPTIONS.items()),
     },
     {
         "name": "astreinte",
         "label": "Astreinte",
         "placeholder": "Toutes les astreintes",
-        "options": [
+        "options": tuple(
             (key, label)
             for key, label in ASTREINTE_OPTIONS.items()
             if key != "pas_d_astreinte"
-        ]
-        + [("pas_d_astreinte", ASTREINTE_OPTIONS["pas_d_astreinte"])],
+        )
+        + (("pas_d_astreinte", ASTREINTE_OPTIONS["pas_d_astreinte"]),),
     },
     {
         "name": "completion",
         "label": "Prestations",
         "placeholder": "Toutes les prestations",
-        "options": list(CLIENT_COMPLETION_OPTIONS.items()),
+        "options": tuple(CLIENT_COMPLETION_OPTIONS.items()),
     },
 ]
 
@@ -443,7 +750,7 @@ FREQUENCY_UNITS = {
     },
 }
 
-FREQUENCY_UNIT_OPTIONS = [(key, data["select_label"]) for key, data in FREQUENCY_UNITS.items()]
+FREQUENCY_UNIT_OPTIONS = tuple((key, data["select_label"]) for key, data in FREQUENCY_UNITS.items())
 
 PREDEFINED_FREQUENCIES = {
     "contrat_annuel": {
@@ -482,12 +789,21 @@ CUSTOM_INTERVAL_VALUE = "custom_interval"
 CUSTOM_INTERVAL_LABEL = "Fréquence personnalisée"
 INTERVAL_PREFIX = "interval:"
 
-FREQUENCY_SELECT_OPTIONS = {
+SLUG_INVALID_CHARS_RE = re.compile(r"[^a-z0-9]+")
+WHITESPACE_RE = re.compile(r"\s+")
+INITIALS_SEPARATORS_RE = re.compile(r"[\s_-]+")
+
+PREDEFINED_FREQUENCY_LABELS = {
     key: data["label"] for key, data in PREDEFINED_FREQUENCIES.items()
 }
+
+FREQUENCY_SELECT_OPTIONS = dict(PREDEFINED_FREQUENCY_LABELS)
 FREQUENCY_SELECT_OPTIONS[CUSTOM_INTERVAL_VALUE] = CUSTOM_INTERVAL_LABEL
 
 PREDEFINED_FREQUENCY_KEYS = tuple(PREDEFINED_FREQUENCIES.keys())
+DEFAULT_SUBCONTRACT_FREQUENCY = (
+    PREDEFINED_FREQUENCY_KEYS[0] if PREDEFINED_FREQUENCY_KEYS else CUSTOM_INTERVAL_VALUE
+)
 
 SUBCONTRACTING_FILTER_BASE = [
     {
@@ -499,7 +815,7 @@ SUBCONTRACTING_FILTER_BASE = [
         "name": "frequency",
         "label": "Fréquence",
         "placeholder": "Toutes les fréquences",
-        "options": [(key, data["label"]) for key, data in PREDEFINED_FREQUENCIES.items()],
+        "options": tuple((key, data["label"]) for key, data in PREDEFINED_FREQUENCIES.items()),
     },
     {
         "name": "status",
@@ -515,9 +831,27 @@ SUBCONTRACTING_FILTER_BASE = [
     },
 ]
 
+templates.env.globals.update(
+    depannage_options=DEPANNAGE_OPTIONS,
+    astreinte_options=ASTREINTE_OPTIONS,
+    status_options=STATUS_OPTIONS,
+    supplier_type_options=SUPPLIER_TYPE_OPTIONS,
+    subcontract_status_options=SUBCONTRACT_STATUS_OPTIONS,
+    subcontract_status_styles=SUBCONTRACT_STATUS_STYLES,
+    subcontract_status_default=SUBCONTRACT_STATUS_DEFAULT,
+    frequency_select_options=FREQUENCY_SELECT_OPTIONS,
+    frequency_unit_options=FREQUENCY_UNIT_OPTIONS,
+    custom_interval_value=CUSTOM_INTERVAL_VALUE,
+    predefined_frequency_keys=PREDEFINED_FREQUENCY_KEYS,
+    filter_format_options=FILTER_FORMAT_OPTIONS,
+    filter_format_labels=FILTER_FORMAT_LABELS,
+)
+
+
+@lru_cache(maxsize=4096)
 def _slugify_identifier(value: str) -> str:
-    normalized = re.sub(r"[^a-z0-9]+", "_", value.lower())
-    normalized = re.sub(r"_+", "_", normalized).strip("_")
+    # "_" fait partie de la classe remplacée : les séries sont déjà fusionnées.
+    normalized = SLUG_INVALID_CHARS_RE.sub("_", value.lower()).strip("_")
     return normalized or "prestation"
 
 
@@ -525,8 +859,9 @@ def _build_groups_from_definitions(
     definitions: Iterable[Any],
 ) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, str]]]:
     grouped: Dict[str, Dict[str, Any]] = {}
+    min_positions: Dict[str, int] = {}
     for definition in definitions:
-        category = getattr(definition, "category", "Autres") or "Autres"
+        category = sys.intern(getattr(definition, "category", "Autres") or "Autres")
         group = grouped.setdefault(
             category,
             {
@@ -535,20 +870,20 @@ def _build_groups_from_definitions(
                 "options": [],
             },
         )
+        position = getattr(definition, "position", 0) or 0
         option = {
-            "value": getattr(definition, "key"),
+            "value": sys.intern(getattr(definition, "key")),
             "label": getattr(definition, "label"),
             "budget_code": getattr(definition, "budget_code"),
-            "position": getattr(definition, "position", 0) or 0,
+            "position": position,
         }
         group["options"].append(option)
+        if position < min_positions.get(category, position + 1):
+            min_positions[category] = position
 
     groups = sorted(
         grouped.values(),
-        key=lambda item: (
-            min((opt.get("position", 0) for opt in item["options"]), default=0),
-            item["title"].lower(),
-        ),
+        key=lambda item: (min_positions[item["title"]], item["title"].lower()),
     )
 
     lookup: Dict[str, Dict[str, str]] = {}
@@ -582,7 +917,22 @@ def _build_groups_from_defaults() -> Tuple[List[Dict[str, Any]], Dict[str, Dict[
     return _build_groups_from_definitions(definitions)
 
 
-def _get_subcontracted_options(
+def _fingerprint_cached(cache: Dict[tuple, Any], fingerprint: tuple, build):
+    # Une seule entrée : la valeur est reconstruite dès que l'empreinte change.
+    value = cache.get(fingerprint)
+    if value is None:
+        value = build()
+        cache.clear()
+        cache[fingerprint] = value
+    return value
+
+
+_subcontracted_options_cache: Dict[
+    tuple, Tuple[List[Dict[str, Any]], Dict[str, Dict[str, str]]]
+] = {}
+
+
+def _build_subcontracted_options(
     session: Session,
 ) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, str]]]:
     definitions = crud.list_prestation_definitions(session)
@@ -591,6 +941,27 @@ def _get_subcontracted_options(
     return _build_groups_from_defaults()
 
 
+def _get_subcontracted_options(
+    session: Session,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, str]]]:
+    return _fingerprint_cached(
+        _subcontracted_options_cache,
+        crud.get_prestation_definitions_fingerprint(session),
+        lambda: _build_subcontracted_options(session),
+    )
+
+
+_entreprise_names_cache: Dict[tuple, List[str]] = {}
+
+
+def _get_entreprise_name_options(session: Session) -> List[str]:
+    return _fingerprint_cached(
+        _entreprise_names_cache,
+        crud.get_entreprises_fingerprint(session),
+        lambda: list(dict.fromkeys(crud.list_entreprise_names(session))),
+    )
+
+
 def _build_category_filter_options(
     groups: Iterable[Dict[str, Any]]
 ) -> List[Tuple[str, str]]:
@@ -605,8 +976,8 @@ def _build_category_filter_options(
 
 
 def _extract_initials(value: str) -> str:
-    cleaned = re.sub(r"\s+", " ", (value or "").strip())
-    parts = [chunk for chunk in re.split(r"[\s_-]+", cleaned) if chunk]
+    cleaned = WHITESPACE_RE.sub(" ", (value or "").strip())
+    parts = [chunk for chunk in INITIALS_SEPARATORS_RE.split(cleaned) if chunk]
     if not parts:
         return "?"
     if len(parts) >= 2:
@@ -692,7 +1063,7 @@ def _resolve_frequency(
 def _build_frequency_labels(
     services: Iterable = (), extra_values: Iterable[str] = ()
 ) -> Dict[str, str]:
-    labels = {key: data["label"] for key, data in PREDEFINED_FREQUENCIES.items()}
+    labels = dict(PREDEFINED_FREQUENCY_LABELS)
     for service in services:
         value = getattr(service, "frequency", None)
         if not value:
@@ -708,10 +1079,7 @@ def _build_frequency_labels(
     return labels
 
 
-def _build_frequency_filter_options(
-    services: Iterable = (), extra_values: Iterable[str] = ()
-) -> List[tuple[str, str]]:
-    labels = _build_frequency_labels(services, extra_values)
+def _build_frequency_filter_options(labels: Dict[str, str]) -> List[tuple[str, str]]:
     options: List[tuple[str, str]] = [
         (key, labels[key]) for key in PREDEFINED_FREQUENCY_KEYS if key in labels
     ]
@@ -736,6 +1104,12 @@ def _parse_budget(value: Optional[str]) -> Optional[float]:
         raise HTTPException(400, "Budget invalide") from exc
 
 
+def _clean_optional_text(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    return value.strip() or None
+
+
 def _normalize_budget_value(value: Any) -> Optional[float]:
     if value is None:
         return None
@@ -767,7 +1141,7 @@ def _clients_context(
     clients,
     q: Optional[str],
     filters: Dict[str, str],
-    entreprises,
+    entreprise_name_options: List[str],
     subcontracted_groups,
 ):
     report = _consume_import_report(request)
@@ -781,21 +1155,10 @@ def _clients_context(
         "request": request,
         "clients": clients,
         "q": q or "",
-        "depannage_options": DEPANNAGE_OPTIONS,
-        "astreinte_options": ASTREINTE_OPTIONS,
-        "status_options": STATUS_OPTIONS,
-        "entreprises": entreprises,
-        "entreprise_name_options": sorted({e.nom for e in entreprises}),
+        "entreprise_name_options": entreprise_name_options,
         "status_key_from_bool": _status_key_from_bool,
-        "subcontract_status_options": SUBCONTRACT_STATUS_OPTIONS,
-        "subcontract_status_styles": SUBCONTRACT_STATUS_STYLES,
-        "subcontract_status_default": SUBCONTRACT_STATUS_DEFAULT,
         "subcontracted_groups": subcontracted_groups,
         "frequency_options": frequency_labels,
-        "frequency_select_options": FREQUENCY_SELECT_OPTIONS,
-        "frequency_unit_options": FREQUENCY_UNIT_OPTIONS,
-        "custom_interval_value": CUSTOM_INTERVAL_VALUE,
-        "predefined_frequency_keys": PREDEFINED_FREQUENCY_KEYS,
         "import_report": report,
         "focus_id": request.query_params.get("focus"),
         "active_filters": filters,
@@ -805,14 +1168,13 @@ def _clients_context(
 
 def _client_form_context(
     request: Request,
-    entreprises,
+    entreprise_name_options: List[str],
     *,
     client=None,
     form_values: Optional[dict] = None,
     is_creation: bool,
     form_action: str,
 ):
-    entreprise_name_options = sorted({e.nom for e in entreprises})
     default_values = {
         "id": None,
         "company_name": "",
@@ -854,9 +1216,6 @@ def _client_form_context(
     return {
         "request": request,
         "entreprise_name_options": entreprise_name_options,
-        "depannage_options": DEPANNAGE_OPTIONS,
-        "astreinte_options": ASTREINTE_OPTIONS,
-        "status_options": STATUS_OPTIONS,
         "form_values": merged_values,
         "is_creation": is_creation,
         "form_action": form_action,
@@ -900,7 +1259,6 @@ def _suppliers_context(
         "suppliers": suppliers,
         "q": q or "",
         "supplier_type": supplier_type or "",
-        "supplier_type_options": SUPPLIER_TYPE_OPTIONS,
         "category_suggestions": [category.label for category in supplier_categories],
         "supplier_categories": supplier_categories,
         "focus_id": request.query_params.get("focus"),
@@ -947,7 +1305,6 @@ def _supplier_creation_context(
 
     return {
         "request": request,
-        "supplier_type_options": SUPPLIER_TYPE_OPTIONS,
         "category_suggestions": [category.label for category in supplier_categories],
         "supplier_categories": supplier_categories,
         "split_categories": _split_categories,
@@ -1023,21 +1380,24 @@ def _subcontractings_context(
     session: Session,
 ):
     report = _consume_import_report(request)
-    category_totals: Dict[str, int] = {}
-    frequency_totals: Dict[str, int] = {}
+    category_totals: Counter[str] = Counter()
+    frequency_totals: Counter[str] = Counter()
     total_budget = 0.0
     service_budget_display: Dict[int, str] = {}
     client_ids = set()
-    service_ids = [s.id for s in services if getattr(s, "id", None) is not None]
+    service_ids: List[int] = []
 
     for service in services:
-        category_totals[service.category] = category_totals.get(service.category, 0) + 1
-        frequency_totals[service.frequency] = frequency_totals.get(service.frequency, 0) + 1
+        category_totals[service.category] += 1
+        frequency_totals[service.frequency] += 1
+        service_id = getattr(service, "id", None)
+        if service_id is not None:
+            service_ids.append(service_id)
         normalized_budget = _normalize_budget_value(getattr(service, "budget", None))
         if normalized_budget is not None:
             total_budget += normalized_budget
-            if getattr(service, "id", None) is not None:
-                service_budget_display[service.id] = _format_currency_value(
+            if service_id is not None:
+                service_budget_display[service_id] = _format_currency_value(
                     normalized_budget
                 )
         if service.client_id:
@@ -1045,7 +1405,7 @@ def _subcontractings_context(
 
     active_frequency = filters.get("frequency")
     frequency_labels = _build_frequency_labels(services, [active_frequency] if active_frequency else [])
-    frequency_filter_options = _build_frequency_filter_options(services, [active_frequency] if active_frequency else [])
+    frequency_filter_options = _build_frequency_filter_options(frequency_labels)
     category_filter_options = _build_category_filter_options(subcontracted_groups)
     filters_definition = [
         {**SUBCONTRACTING_FILTER_BASE[0], "options": category_filter_options},
@@ -1078,10 +1438,6 @@ def _subcontractings_context(
         "services": services,
         "q": q or "",
         "frequency_options": frequency_labels,
-        "frequency_select_options": FREQUENCY_SELECT_OPTIONS,
-        "frequency_unit_options": FREQUENCY_UNIT_OPTIONS,
-        "custom_interval_value": CUSTOM_INTERVAL_VALUE,
-        "predefined_frequency_keys": PREDEFINED_FREQUENCY_KEYS,
         "category_totals": category_totals,
         "frequency_totals": frequency_totals,
         "total_budget": total_budget,
@@ -1092,9 +1448,6 @@ def _subcontractings_context(
         "active_filters": filters,
         "filters_definition": filters_definition,
         "focus_id": request.query_params.get("focus"),
-        "subcontract_status_options": SUBCONTRACT_STATUS_OPTIONS,
-        "subcontract_status_styles": SUBCONTRACT_STATUS_STYLES,
-        "subcontract_status_default": SUBCONTRACT_STATUS_DEFAULT,
         "subcontracted_groups": subcontracted_groups,
         "import_report": report,
         "comments_by_service": comments_by_service,
@@ -1105,19 +1458,14 @@ def _subcontractings_context(
 def _empty_subcontracted_service(
     default_client_id: Optional[int] = None,
 ) -> SimpleNamespace:
-    default_frequency = (
-        PREDEFINED_FREQUENCY_KEYS[0]
-        if PREDEFINED_FREQUENCY_KEYS
-        else CUSTOM_INTERVAL_VALUE
-    )
-    frequency_details = PREDEFINED_FREQUENCIES.get(default_frequency, {})
+    frequency_details = PREDEFINED_FREQUENCIES.get(DEFAULT_SUBCONTRACT_FREQUENCY, {})
     return SimpleNamespace(
         id=None,
         prestation_key=None,
         prestation_label="Nouvelle prestation",
         budget_code="",
         budget=None,
-        frequency=default_frequency,
+        frequency=DEFAULT_SUBCONTRACT_FREQUENCY,
         frequency_interval=frequency_details.get("interval"),
         frequency_unit=frequency_details.get("unit"),
         status=SUBCONTRACT_STATUS_DEFAULT,
@@ -1221,13 +1569,9 @@ def _admin_prestations_context(
         )
         group["definitions"].append(definition)
 
+    # Les définitions étant triées par position puis catégorie, l'ordre
+    # d'insertion des groupes suit déjà leur position minimale.
     grouped_definitions = list(grouped.values())
-    grouped_definitions.sort(
-        key=lambda group: (
-            min((d.position or 0) for d in group["definitions"]),
-            group["category"].lower(),
-        )
-    )
 
     if not grouped_definitions and not definitions:
         # Provide a fallback view based on the defaults when no definition exists yet.
@@ -1270,9 +1614,19 @@ def _admin_prestations_context(
 
 @app.on_event("startup")
 def on_startup():
+    anyio.to_thread.current_default_thread_limiter().total_tokens = WORKER_THREADS
     init_db()
     _ensure_default_admin_user()
-    app.state.import_reports = {}
+    _dummy_password_hash()
+    _start_temporary_passwords_worker()
+    logger.info("Hachage des mots de passe : bcrypt, coût %s.", BCRYPT_ROUNDS)
+    for template_name in templates.env.list_templates(extensions=["html"]):
+        templates.env.get_template(template_name)
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    _stop_temporary_passwords_worker()
 
 # Page liste
 
@@ -1281,7 +1635,13 @@ def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     session: Session = Depends(get_session),
 ) -> Token:
+    if _login_throttled(form_data.username):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=LOGIN_THROTTLE_MESSAGE,
+        )
     user = authenticate_user(session, form_data.username, form_data.password)
+    _record_login_result(form_data.username, user is not None)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1296,15 +1656,17 @@ def login_for_access_token(
 
 
 @app.get("/login", response_class=HTMLResponse)
-def login_page(request: Request, next: Optional[str] = None):
+def login_page(
+    request: Request,
+    next: Optional[str] = None,
+    session: Session = Depends(get_session),
+):
     cookie_token = request.cookies.get(SESSION_COOKIE_NAME)
     if cookie_token:
         try:
-            payload = jwt.decode(cookie_token, SECRET_KEY, algorithms=[ALGORITHM])
-            username = payload.get("sub")
+            username = _decode_token_subject(cookie_token)
             if username:
-                with Session(engine) as session:
-                    user = crud.get_user_by_username(session, username)
+                user = crud.get_user_by_username(session, username)
                 if user:
                     request.state.user = user
                     return templates.TemplateResponse(
@@ -1337,19 +1699,27 @@ def login_submit(
     next: Optional[str] = Form(None),
     session: Session = Depends(get_session),
 ):
-    user = authenticate_user(session, username, password)
+    throttled = _login_throttled(username)
+    user = None
+    if not throttled:
+        user = authenticate_user(session, username, password)
+        _record_login_result(username, user is not None)
     if not user:
         request.state.user = None
         return templates.TemplateResponse(
             "login.html",
             {
                 "request": request,
-                "error": "Identifiants invalides",
+                "error": LOGIN_THROTTLE_MESSAGE if throttled else "Identifiants invalides",
                 "username": username,
                 "next": next or "",
                 "current_user": None,
             },
-            status_code=status.HTTP_401_UNAUTHORIZED,
+            status_code=(
+                status.HTTP_429_TOO_MANY_REQUESTS
+                if throttled
+                else status.HTTP_401_UNAUTHORIZED
+            ),
         )
     user = crud.record_user_login(session, user)
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -1390,7 +1760,7 @@ def logout(
 
 
 @app.get("/mon-compte", response_class=HTMLResponse)
-def account_page(request: Request, current_user: CurrentUser):
+async def account_page(request: Request, current_user: CurrentUser):
     success = request.query_params.get("success") == "1"
     return templates.TemplateResponse(
         "account.html",
@@ -1414,14 +1784,16 @@ def account_change_password(
     session: Session = Depends(get_session),
 ):
     errors: List[str] = []
-    if not verify_password(current_password, current_user.hashed_password):
-        errors.append("Le mot de passe actuel est incorrect.")
     if len(new_password) < PASSWORD_MIN_LENGTH:
         errors.append(
             f"Le nouveau mot de passe doit contenir au moins {PASSWORD_MIN_LENGTH} caractères."
         )
     if new_password != confirm_password:
         errors.append("La confirmation du mot de passe ne correspond pas.")
+    if not errors and not verify_password(
+        current_password, current_user.hashed_password
+    ):
+        errors.append("Le mot de passe actuel est incorrect.")
 
     db_user = crud.get_user_by_username(session, current_user.username)
     if not db_user:
@@ -1459,76 +1831,89 @@ def account_change_password(
     )
 
 
-@app.get("/admin/utilisateurs", response_class=HTMLResponse)
-def admin_users_page(
+def _admin_users_context(
     request: Request,
-    _current_user: CurrentUser,
-    session: Session = Depends(get_session),
-):
-    _ensure_admin_access(_current_user)
+    session: Session,
+    *,
+    errors: Optional[List[str]] = None,
+    success: bool = False,
+    form_values: Optional[Dict[str, str]] = None,
+    focus_username: Optional[str] = None,
+    reset_result: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
     users = crud.list_users(session)
     login_history = crud.get_login_history_for_users(
         session, [user.id for user in users if user.id], limit=5
     )
-    return templates.TemplateResponse(
-        "admin_users.html",
-        {
-            "request": request,
-            "users": users,
-            "errors": None,
-            "success": request.query_params.get("success") == "1",
-            "form_values": {"username": ""},
-            "focus_username": request.query_params.get("focus"),
-            "login_history": login_history,
-            "reset_result": None,
-        },
-    )
+    return {
+        "request": request,
+        "users": users,
+        "errors": errors,
+        "success": success,
+        "form_values": form_values or {"username": ""},
+        "focus_username": focus_username,
+        "login_history": login_history,
+        "reset_result": reset_result,
+    }
 
 
-@app.post("/admin/utilisateurs", response_class=HTMLResponse)
-def admin_users_create(
+@app.get("/admin/utilisateurs", response_class=HTMLResponse)
+def admin_users_page(
     request: Request,
-    _current_user: CurrentUser,
-    username: str = Form(...),
-    password: str = Form(...),
+    _current_user: AdminUser,
     session: Session = Depends(get_session),
 ):
-    _ensure_admin_access(_current_user)
-    trimmed_username = username.strip()
+    context = _admin_users_context(
+        request,
+        session,
+        success=request.query_params.get("success") == "1",
+        focus_username=request.query_params.get("focus"),
+    )
+    return templates.TemplateResponse("admin_users.html", context)
+
+
+def _validate_new_user(
+    session: Session, username: str, password: str
+) -> Tuple[List[str], Optional[str]]:
     errors: List[str] = []
-    if not trimmed_username:
+    if not username:
         errors.append("L'identifiant est obligatoire.")
-    if " " in trimmed_username:
+    if " " in username:
         errors.append("L'identifiant ne peut pas contenir d'espaces.")
     if not password:
         errors.append("Le mot de passe est obligatoire.")
-    if trimmed_username and crud.get_user_by_username(session, trimmed_username):
+    if username and crud.get_user_by_username(session, username):
         errors.append("Cet identifiant est déjà utilisé.")
+    if errors:
+        return errors, None
+
+    # Le hachage bcrypt n'est calculé qu'une fois toutes les vérifications passées.
+    try:
+        return errors, get_password_hash(password)
+    except ValueError as exc:
+        return [str(exc)], None
 
-    hashed_password: Optional[str] = None
-    if not errors:
-        try:
-            hashed_password = get_password_hash(password)
-        except ValueError as exc:
-            errors.append(str(exc))
 
+@app.post("/admin/utilisateurs", response_class=HTMLResponse)
+def admin_users_create(
+    request: Request,
+    _current_user: AdminUser,
+    username: str = Form(...),
+    password: str = Form(...),
+    session: Session = Depends(get_session),
+):
+    trimmed_username = username.strip()
+    errors, hashed_password = _validate_new_user(session, trimmed_username, password)
     if errors or hashed_password is None:
-        users = crud.list_users(session)
-        login_history = crud.get_login_history_for_users(
-            session, [user.id for user in users if user.id], limit=5
+        context = _admin_users_context(
+            request,
+            session,
+            errors=errors,
+            form_values={"username": trimmed_username},
         )
         return templates.TemplateResponse(
             "admin_users.html",
-            {
-                "request": request,
-                "users": users,
-                "errors": errors,
-                "success": False,
-                "form_values": {"username": trimmed_username},
-                "focus_username": None,
-                "login_history": login_history,
-                "reset_result": None,
-            },
+            context,
             status_code=status.HTTP_400_BAD_REQUEST,
         )
 
@@ -1548,11 +1933,10 @@ def admin_users_create(
 )
 def admin_users_reset_password(
     request: Request,
-    _current_user: CurrentUser,
+    _current_user: AdminUser,
     username: str,
     session: Session = Depends(get_session),
 ):
-    _ensure_admin_access(_current_user)
     errors: List[str] = []
     reset_result: Optional[Dict[str, str]] = None
     target_user = crud.get_user_by_username(session, username)
@@ -1560,8 +1944,7 @@ def admin_users_reset_password(
         errors.append("Utilisateur introuvable.")
     else:
         try:
-            temporary_password = _generate_temporary_password()
-            hashed_password = get_password_hash(temporary_password)
+            temporary_password, hashed_password = _take_temporary_password()
         except ValueError as exc:
             errors.append(str(exc))
         else:
@@ -1570,23 +1953,17 @@ def admin_users_reset_password(
                 "username": target_user.username,
                 "password": temporary_password,
             }
-    users = crud.list_users(session)
-    login_history = crud.get_login_history_for_users(
-        session, [user.id for user in users if user.id], limit=5
+    context = _admin_users_context(
+        request,
+        session,
+        errors=errors or None,
+        focus_username=reset_result["username"] if reset_result else None,
+        reset_result=reset_result,
     )
     status_code = status.HTTP_400_BAD_REQUEST if errors else status.HTTP_200_OK
     return templates.TemplateResponse(
         "admin_users.html",
-        {
-            "request": request,
-            "users": users,
-            "errors": errors or None,
-            "success": False,
-            "form_values": {"username": ""},
-            "focus_username": reset_result["username"] if reset_result else None,
-            "login_history": login_history,
-            "reset_result": reset_result,
-        },
+        context,
         status_code=status_code,
     )
 
@@ -1594,10 +1971,9 @@ def admin_users_reset_password(
 @app.get("/admin/prestations", response_class=HTMLResponse)
 def admin_prestations_page(
     request: Request,
-    _current_user: CurrentUser,
+    _current_user: AdminUser,
     session: Session = Depends(get_session),
 ):
-    _ensure_admin_access(_current_user)
     context = _admin_prestations_context(
         request,
         session,
@@ -1608,10 +1984,17 @@ def admin_prestations_page(
     return templates.TemplateResponse("admin_prestations.html", context)
 
 
+def _parse_position(value: Optional[str]) -> Optional[int]:
+    cleaned = (value or "").strip() or "0"
+    if not cleaned.isdecimal():
+        return None
+    return int(cleaned)
+
+
 @app.post("/admin/prestations", response_class=HTMLResponse)
 def admin_prestations_create(
     request: Request,
-    _current_user: CurrentUser,
+    _current_user: AdminUser,
     label: str = Form(...),
     budget_code: str = Form(...),
     category: str = Form(...),
@@ -1619,7 +2002,6 @@ def admin_prestations_create(
     identifier: Optional[str] = Form(None),
     session: Session = Depends(get_session),
 ):
-    _ensure_admin_access(_current_user)
     trimmed_label = label.strip()
     trimmed_category = category.strip()
     trimmed_budget_code = budget_code.strip()
@@ -1637,11 +2019,8 @@ def admin_prestations_create(
     if generated_key and crud.get_prestation_definition_by_key(session, generated_key):
         errors.append("Cet identifiant est déjà utilisé.")
 
-    try:
-        position_value = int(position or 0)
-        if position_value < 0:
-            raise ValueError
-    except ValueError:
+    position_value = _parse_position(position)
+    if position_value is None:
         errors.append("La position doit être un entier positif.")
         position_value = 0
 
@@ -1683,7 +2062,7 @@ def admin_prestations_create(
 @app.post("/admin/prestations/{definition_id}/update", response_class=HTMLResponse)
 def admin_prestations_update(
     request: Request,
-    _current_user: CurrentUser,
+    _current_user: AdminUser,
     definition_id: int,
     label: str = Form(...),
     budget_code: str = Form(...),
@@ -1691,7 +2070,6 @@ def admin_prestations_update(
     position: Optional[str] = Form("0"),
     session: Session = Depends(get_session),
 ):
-    _ensure_admin_access(_current_user)
     definition = crud.get_prestation_definition(session, definition_id)
     if not definition:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Prestation introuvable")
@@ -1708,11 +2086,8 @@ def admin_prestations_update(
     if not trimmed_budget_code:
         errors.append("Le code budget est obligatoire.")
 
-    try:
-        position_value = int(position or 0)
-        if position_value < 0:
-            raise ValueError
-    except ValueError:
+    position_value = _parse_position(position)
+    if position_value is None:
         errors.append("La position doit être un entier positif.")
         position_value = definition.position or 0
 
@@ -1757,33 +2132,62 @@ def admin_prestations_update(
     )
 
 
-# Page liste
-@app.get("/", response_class=HTMLResponse)
-def clients_page(
+def _clients_etag(session: Session, user: User) -> str:
+    fingerprint = (crud.get_clients_fingerprint(session), user.username)
+    digest = hashlib.blake2b(repr(fingerprint).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _render_clients(
     request: Request,
-    _current_user: CurrentUser,
-    q: Optional[str] = None,
-    status: Optional[str] = None,
-    depannage: Optional[str] = None,
-    astreinte: Optional[str] = None,
-    completion: Optional[str] = None,
-    session: Session = Depends(get_session),
+    session: Session,
+    user: User,
+    q: Optional[str],
+    status: Optional[str],
+    depannage: Optional[str],
+    astreinte: Optional[str],
+    completion: Optional[str],
 ):
+    etag = None
+    if "report" not in request.query_params:
+        etag = _clients_etag(session, user)
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
     filters = _extract_client_filters(status, depannage, astreinte, completion)
     clients = crud.list_clients(session, q=q, filters=filters)
-    entreprises = crud.list_entreprises(session)
     subcontracted_groups, _ = _get_subcontracted_options(session)
-    return templates.TemplateResponse(
+    response = templates.TemplateResponse(
         "clients_list.html",
         _clients_context(
             request,
             clients,
             q,
             filters,
-            entreprises,
+            _get_entreprise_name_options(session),
             subcontracted_groups,
         ),
     )
+    if etag:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+# Page liste
+@app.get("/", response_class=HTMLResponse)
+def clients_page(
+    request: Request,
+    _current_user: CurrentUser,
+    q: Optional[str] = None,
+    status: Optional[str] = None,
+    depannage: Optional[str] = None,
+    astreinte: Optional[str] = None,
+    completion: Optional[str] = None,
+    session: Session = Depends(get_session),
+):
+    return _render_clients(
+        request, session, _current_user, q, status, depannage, astreinte, completion
+    )
 
 
 @app.get("/clients/new", response_class=HTMLResponse)
@@ -1792,12 +2196,11 @@ def new_client_page(
     _current_user: CurrentUser,
     session: Session = Depends(get_session),
 ):
-    entreprises = crud.list_entreprises(session)
     return templates.TemplateResponse(
         "client_form.html",
         _client_form_context(
             request,
-            entreprises,
+            _get_entreprise_name_options(session),
             is_creation=True,
             form_action="/clients/new",
         ),
@@ -1815,12 +2218,11 @@ def edit_client_page(
     if not client:
         raise HTTPException(404, "Client introuvable")
 
-    entreprises = crud.list_entreprises(session)
     return templates.TemplateResponse(
         "client_form.html",
         _client_form_context(
             request,
-            entreprises,
+            _get_entreprise_name_options(session),
             client=client,
             is_creation=False,
             form_action=f"/clients/{client_id}/edit",
@@ -1912,66 +2314,43 @@ def download_suppliers_excel(
 
 @app.get("/fournisseurs/import/template")
 @app.get("/fournisseurs/import/template/")
-def download_supplier_import_template(_current_user: CurrentUser):
-    buffer = _build_supplier_import_template()
-    return Response(
-        content=buffer.getvalue(),
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={
-            "Content-Disposition": "attachment; filename=modele_import_fournisseurs.xlsx"
-        },
+async def download_supplier_import_template(request: Request, _current_user: CurrentUser):
+    return _static_template_response(
+        request, SUPPLIER_IMPORT_TEMPLATE, "modele_import_fournisseurs.xlsx"
     )
 
 
 @app.post("/fournisseurs/import")
-async def import_suppliers(
+def import_suppliers(
     _current_user: CurrentUser,
-    file: UploadFile = File(...),
-    session: Session = Depends(get_session),
-):
-    if not file.filename:
-        return _store_import_report(
-            "/fournisseurs",
-            created=0,
-            total=0,
-            errors=["Aucun fichier sélectionné."],
-            filename="Import",
-            singular_label="fournisseur",
-            plural_label="fournisseurs",
-        )
-
-    if not file.filename.lower().endswith(ALLOWED_IMPORT_EXTENSIONS):
-        return _store_import_report(
-            "/fournisseurs",
-            created=0,
-            total=0,
-            errors=[
-                "Format de fichier non supporté. Merci d'utiliser un fichier Excel (.xlsx)."
-            ],
-            filename=file.filename,
-            singular_label="fournisseur",
-            plural_label="fournisseurs",
-        )
+    file: UploadFile = File(...),
+    session: Session = Depends(get_session),
+):
+    rejection = _reject_import_file(
+        file,
+        "/fournisseurs",
+        "Import",
+        "fournisseur",
+        "fournisseurs",
+    )
+    if rejection:
+        return rejection
 
-    content = await file.read()
     try:
-        rows = parse_suppliers_excel(content)
+        rows = parse_suppliers_excel(file.file)
     except ValueError as exc:
-        return _store_import_report(
+        return _import_error(
             "/fournisseurs",
-            created=0,
-            total=0,
-            errors=[str(exc)],
-            filename=file.filename,
-            singular_label="fournisseur",
-            plural_label="fournisseurs",
+            file.filename,
+            str(exc),
+            "fournisseur",
+            "fournisseurs",
         )
 
-    created = 0
+    entries: List[Tuple[Any, Tuple[SupplierCreate, List[SupplierContactCreate]]]] = []
+    category_labels: List[str] = []
     errors: List[str] = []
     for idx, row in enumerate(rows, start=1):
-        contacts_raw = row.get("contacts", [])
-        contacts_payload = [SupplierContactCreate(**contact) for contact in contacts_raw]
         payload = {
             k: v for k, v in row.items() if not k.startswith("__") and k != "contacts"
         }
@@ -1979,20 +2358,22 @@ async def import_suppliers(
         payload["categories"] = _normalize_categories(payload.get("categories"))
         row_number = row.get("__row__", idx)
         try:
+            contacts_payload = [
+                SupplierContactCreate(**contact) for contact in row.get("contacts", [])
+            ]
             supplier_type = payload.get("supplier_type")
             if supplier_type not in SUPPLIER_TYPE_OPTIONS:
                 raise ValueError("Type de fournisseur invalide")
-            _ensure_supplier_categories(session, payload.get("categories"))
-            crud.create_supplier(
-                session,
-                SupplierCreate(**payload),
-                contacts=contacts_payload,
-            )
-            created += 1
+            entries.append((row_number, (SupplierCreate(**payload), contacts_payload)))
+            category_labels.extend(_split_categories(payload.get("categories")))
         except Exception as exc:
-            session.rollback()
             errors.append(f"Ligne {row_number} : {exc}")
 
+    crud.ensure_supplier_categories(session, category_labels)
+    created = _insert_import_batches(
+        session, entries, crud.bulk_create_suppliers, errors
+    )
+
     return _store_import_report(
         "/fournisseurs",
         created=created,
@@ -2142,21 +2523,20 @@ def clients_fragment(
     completion: Optional[str] = None,
     session: Session = Depends(get_session),
 ):
-    filters = _extract_client_filters(status, depannage, astreinte, completion)
-    clients = crud.list_clients(session, q=q, filters=filters)
-    entreprises = crud.list_entreprises(session)
-    subcontracted_groups, _ = _get_subcontracted_options(session)
-    return templates.TemplateResponse(
-        "clients_list.html",
-        _clients_context(
-            request,
-            clients,
-            q,
-            filters,
-            entreprises,
-            subcontracted_groups,
-        ),
+    return _render_clients(
+        request, session, _current_user, q, status, depannage, astreinte, completion
+    )
+
+
+def _subcontractings_etag(session: Session, user: User) -> str:
+    # La semaine courante intervient dans le filtre des commandes en retard.
+    fingerprint = (
+        crud.get_subcontracting_fingerprint(session),
+        user.username,
+        datetime.utcnow().isocalendar().week,
     )
+    digest = hashlib.blake2b(repr(fingerprint).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
 
 
 @app.get("/prestations", response_class=HTMLResponse)
@@ -2170,6 +2550,11 @@ def subcontracted_services_page(
     order_status: Optional[str] = None,
     session: Session = Depends(get_session),
 ):
+    etag = None
+    if "report" not in request.query_params:
+        etag = _subcontractings_etag(session, _current_user)
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
     subcontracted_groups, _ = _get_subcontracted_options(session)
     valid_categories = [group.get("title") for group in subcontracted_groups]
     filters = _extract_subcontracting_filters(
@@ -2180,7 +2565,7 @@ def subcontracted_services_page(
         valid_categories=[c for c in valid_categories if c],
     )
     services = crud.list_subcontracted_services(session, q=q, filters=filters)
-    return templates.TemplateResponse(
+    response = templates.TemplateResponse(
         "subcontractings_list.html",
         _subcontractings_context(
             request,
@@ -2191,6 +2576,10 @@ def subcontracted_services_page(
             session,
         ),
     )
+    if etag:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "private, no-cache"
+    return response
 
 
 @app.get("/prestations/{service_id}/edit", response_class=HTMLResponse)
@@ -2205,7 +2594,6 @@ def subcontracted_service_edit_page(
         raise HTTPException(404, "Prestation introuvable")
 
     subcontracted_groups, subcontracted_lookup = _get_subcontracted_options(session)
-    available_keys = set(subcontracted_lookup.keys())
     clients = crud.list_client_choices(session)
     suppliers = crud.list_suppliers(session, limit=300)
     comments = crud.list_subcontracted_service_comments(session, service_id)
@@ -2215,14 +2603,7 @@ def subcontracted_service_edit_page(
             "request": request,
             "service": service,
             "subcontracted_groups": subcontracted_groups,
-            "frequency_options": _build_frequency_labels([service]),
-            "frequency_select_options": FREQUENCY_SELECT_OPTIONS,
-            "frequency_unit_options": FREQUENCY_UNIT_OPTIONS,
-            "custom_interval_value": CUSTOM_INTERVAL_VALUE,
-            "predefined_frequency_keys": PREDEFINED_FREQUENCY_KEYS,
-            "subcontract_status_options": SUBCONTRACT_STATUS_OPTIONS,
-            "subcontract_status_default": SUBCONTRACT_STATUS_DEFAULT,
-            "available_prestations": available_keys,
+            "available_prestations": subcontracted_lookup,
             "clients": clients,
             "suppliers": suppliers,
             "comments": comments,
@@ -2244,21 +2625,13 @@ def subcontracted_service_create_page(
     suppliers = crud.list_suppliers(session, limit=300)
     default_client_id = clients[0].id if clients else None
     empty_service = _empty_subcontracted_service(default_client_id)
-    available_keys = set(subcontracted_lookup.keys())
     return templates.TemplateResponse(
         "subcontracting_edit.html",
         {
             "request": request,
             "service": empty_service,
             "subcontracted_groups": subcontracted_groups,
-            "frequency_options": _build_frequency_labels([]),
-            "frequency_select_options": FREQUENCY_SELECT_OPTIONS,
-            "frequency_unit_options": FREQUENCY_UNIT_OPTIONS,
-            "custom_interval_value": CUSTOM_INTERVAL_VALUE,
-            "predefined_frequency_keys": PREDEFINED_FREQUENCY_KEYS,
-            "subcontract_status_options": SUBCONTRACT_STATUS_OPTIONS,
-            "subcontract_status_default": SUBCONTRACT_STATUS_DEFAULT,
-            "available_prestations": available_keys,
+            "available_prestations": subcontracted_lookup,
             "clients": clients,
             "suppliers": suppliers,
             "comments": [],
@@ -2285,11 +2658,13 @@ def update_subcontracted_service(
     order_week: Optional[str] = Form(None),
     session: Session = Depends(get_session),
 ):
-    service = crud.get_subcontracted_service(session, service_id)
+    service, client = crud.get_subcontracted_service_with_client(
+        session, service_id, client_id
+    )
     if not service:
         raise HTTPException(404, "Prestation introuvable")
 
-    if not crud.get_client(session, client_id):
+    if not client:
         raise HTTPException(400, "Client inconnu")
 
     supplier_value = _resolve_supplier_id(session, supplier_id)
@@ -2310,11 +2685,9 @@ def update_subcontracted_service(
 
     parsed_budget = _parse_budget(budget)
 
-    realization_value: Optional[str] = None
-    if resolved_frequency == "prestation_ponctuelle" and realization_week:
-        realization_value = realization_week.strip().upper()
-
-    order_value = order_week.strip().upper() if order_week else None
+    realization_value = (
+        realization_week if resolved_frequency == "prestation_ponctuelle" else None
+    )
 
     update_payload = SubcontractedServiceUpdate(
         prestation_key=prestation,
@@ -2329,7 +2702,7 @@ def update_subcontracted_service(
         frequency_unit=resolved_unit,
         status=status,
         realization_week=realization_value,
-        order_week=order_value,
+        order_week=order_week,
         client_id=client_id,
         supplier_id=supplier_value,
     )
@@ -2392,7 +2765,7 @@ def delete_subcontracted_service_comment(
     if not comment or comment.service_id != service_id:
         raise HTTPException(404, "Commentaire introuvable")
 
-    is_admin = _current_user.username == DEFAULT_ADMIN_USERNAME
+    is_admin = _is_admin(_current_user)
     is_author = _current_user.username == comment.author_name
     if not (is_admin or is_author):
         raise HTTPException(
@@ -2419,8 +2792,46 @@ def _create_subcontracted_service_from_form(
     status: str,
     realization_week: Optional[str],
     order_week: Optional[str],
+    subcontracted_lookup: Optional[Dict[str, Dict[str, str]]] = None,
 ):
-    _, subcontracted_lookup = _get_subcontracted_options(session)
+    created = crud.create_subcontracted_service(
+        session,
+        client_id,
+        _build_subcontracted_service_payload(
+            session,
+            prestation=prestation,
+            supplier_id=supplier_id,
+            budget=budget,
+            frequency=frequency,
+            custom_frequency_interval=custom_frequency_interval,
+            custom_frequency_unit=custom_frequency_unit,
+            status=status,
+            realization_week=realization_week,
+            order_week=order_week,
+            subcontracted_lookup=subcontracted_lookup,
+        ),
+    )
+    if not created:
+        raise HTTPException(404, "Client introuvable")
+    return created
+
+
+def _build_subcontracted_service_payload(
+    session: Session,
+    *,
+    prestation: str,
+    supplier_id: Optional[int] = None,
+    budget: Optional[str],
+    frequency: str,
+    custom_frequency_interval: Optional[str],
+    custom_frequency_unit: Optional[str],
+    status: str,
+    realization_week: Optional[str],
+    order_week: Optional[str],
+    subcontracted_lookup: Optional[Dict[str, Dict[str, str]]] = None,
+) -> SubcontractedServiceCreate:
+    if subcontracted_lookup is None:
+        _, subcontracted_lookup = _get_subcontracted_options(session)
     details = subcontracted_lookup.get(prestation)
     if not details:
         raise HTTPException(400, "Prestation inconnue")
@@ -2438,36 +2849,50 @@ def _create_subcontracted_service_from_form(
 
     parsed_budget = _parse_budget(budget)
     realization_value = (
-        realization_week.strip().upper()
-        if realization_week and resolved_frequency == "prestation_ponctuelle"
-        else None
+        realization_week if resolved_frequency == "prestation_ponctuelle" else None
     )
-    order_value = order_week.strip().upper() if order_week else None
 
-    created = crud.create_subcontracted_service(
-        session,
-        client_id,
-        SubcontractedServiceCreate(
-            prestation_key=prestation,
-            prestation_label=details["label"],
-            category=details["category"],
-            budget_code=details["budget_code"],
-            budget=parsed_budget,
-            frequency=resolved_frequency,
-            frequency_interval=resolved_interval,
-            frequency_unit=resolved_unit,
-            status=status,
-            realization_week=realization_value,
-            order_week=order_value,
-            supplier_id=supplier_id,
-        ),
+    return SubcontractedServiceCreate(
+        prestation_key=prestation,
+        prestation_label=details["label"],
+        category=details["category"],
+        budget_code=details["budget_code"],
+        budget=parsed_budget,
+        frequency=resolved_frequency,
+        frequency_interval=resolved_interval,
+        frequency_unit=resolved_unit,
+        status=status,
+        realization_week=realization_value,
+        order_week=order_week,
+        supplier_id=supplier_id,
     )
-    if not created:
-        raise HTTPException(404, "Client introuvable")
-    return created
 
 
-def _resolve_import_client_id(session: Session, row: Dict[str, Any]) -> int:
+def _resolve_import_client_id(
+    session: Session,
+    row: Dict[str, Any],
+    cache: Optional[Dict[Tuple[Any, str, str], Union[int, ValueError]]] = None,
+) -> int:
+    if cache is None:
+        return _find_import_client_id(session, row)
+    cache_key = (
+        row.get("client_id"),
+        (row.get("company_name") or "").strip().lower(),
+        (row.get("client_name") or "").strip().lower(),
+    )
+    if cache_key not in cache:
+        # Les échecs sont aussi mémorisés : une ligne répétée ne relance pas la requête.
+        try:
+            cache[cache_key] = _find_import_client_id(session, row)
+        except ValueError as exc:
+            cache[cache_key] = exc
+    result = cache[cache_key]
+    if isinstance(result, ValueError):
+        raise ValueError(*result.args)
+    return result
+
+
+def _find_import_client_id(session: Session, row: Dict[str, Any]) -> int:
     raw_client_id = row.get("client_id")
     if raw_client_id:
         client = crud.get_client(session, int(raw_client_id))
@@ -2503,11 +2928,27 @@ def _resolve_import_client_id(session: Session, row: Dict[str, Any]) -> int:
     return matches[0].id
 
 
+def _build_prestation_slug_index(
+    lookup: Dict[str, Dict[str, str]]
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    key_by_slug: Dict[str, str] = {}
+    key_by_label_slug: Dict[str, str] = {}
+    for key, details in lookup.items():
+        key_by_slug.setdefault(_slugify_identifier(key), key)
+        key_by_label_slug.setdefault(
+            _slugify_identifier(details.get("label", "")), key
+        )
+    return key_by_slug, key_by_label_slug
+
+
 def _resolve_import_prestation_key(
-    row: Dict[str, Any], lookup: Dict[str, Dict[str, str]]
+    row: Dict[str, Any],
+    lookup: Dict[str, Dict[str, str]],
+    slug_index: Tuple[Dict[str, str], Dict[str, str]],
 ) -> str:
     raw_value = (row.get("prestation") or "").strip()
     label_value = (row.get("prestation_label") or "").strip()
+    key_by_slug, key_by_label_slug = slug_index
 
     if raw_value:
         if raw_value in lookup:
@@ -2515,15 +2956,13 @@ def _resolve_import_prestation_key(
         normalized_value = _slugify_identifier(raw_value)
         if normalized_value in lookup:
             return normalized_value
-        for key in lookup.keys():
-            if _slugify_identifier(key) == normalized_value:
-                return key
+        if normalized_value in key_by_slug:
+            return key_by_slug[normalized_value]
 
     if label_value:
         normalized_label = _slugify_identifier(label_value)
-        for key, details in lookup.items():
-            if _slugify_identifier(details.get("label", "")) == normalized_label:
-                return key
+        if normalized_label in key_by_label_slug:
+            return key_by_label_slug[normalized_label]
 
     target = raw_value or label_value or "(libellé manquant)"
     raise ValueError(f"Prestation '{target}' introuvable dans le référentiel.")
@@ -2588,58 +3027,45 @@ def create_subcontracted_service_from_view(
 
 
 @app.post("/prestations/import")
-async def import_subcontracted_services(
+def import_subcontracted_services(
     _current_user: CurrentUser,
     file: UploadFile = File(...),
     session: Session = Depends(get_session),
 ):
-    if not file.filename:
-        return _store_import_report(
-            "/prestations",
-            created=0,
-            total=0,
-            errors=["Aucun fichier sélectionné."],
-            filename="Import prestations",
-            singular_label="prestation",
-            plural_label="prestations",
-        )
-
-    if not file.filename.lower().endswith(ALLOWED_IMPORT_EXTENSIONS):
-        return _store_import_report(
-            "/prestations",
-            created=0,
-            total=0,
-            errors=[
-                "Format de fichier non supporté. Merci d'utiliser un fichier Excel (.xlsx)."
-            ],
-            filename=file.filename,
-            singular_label="prestation",
-            plural_label="prestations",
-        )
+    rejection = _reject_import_file(
+        file,
+        "/prestations",
+        "Import prestations",
+        "prestation",
+        "prestations",
+    )
+    if rejection:
+        return rejection
 
-    content = await file.read()
     try:
-        rows = parse_prestations_excel(content)
+        rows = parse_prestations_excel(file.file)
     except ValueError as exc:
-        return _store_import_report(
+        return _import_error(
             "/prestations",
-            created=0,
-            total=0,
-            errors=[str(exc)],
-            filename=file.filename,
-            singular_label="prestation",
-            plural_label="prestations",
+            file.filename,
+            str(exc),
+            "prestation",
+            "prestations",
         )
 
     _, subcontracted_lookup = _get_subcontracted_options(session)
-    created = 0
+    prestation_slug_index = _build_prestation_slug_index(subcontracted_lookup)
+    client_ids: Dict[Tuple[Any, str, str], Union[int, ValueError]] = {}
+    entries: List[Tuple[Any, Tuple[int, SubcontractedServiceCreate]]] = []
     errors: List[str] = []
 
     for idx, row in enumerate(rows, start=1):
         row_number = row.get("__row__", idx)
         try:
-            client_id = _resolve_import_client_id(session, row)
-            prestation_key = _resolve_import_prestation_key(row, subcontracted_lookup)
+            client_id = _resolve_import_client_id(session, row, client_ids)
+            prestation_key = _resolve_import_prestation_key(
+                row, subcontracted_lookup, prestation_slug_index
+            )
             frequency_value, custom_interval, custom_unit = _prepare_import_frequency(row)
             status_value = row.get("status") or SUBCONTRACT_STATUS_DEFAULT
             if status_value not in SUBCONTRACT_STATUS_OPTIONS:
@@ -2651,33 +3077,27 @@ async def import_subcontracted_services(
             realization_week = row.get("realization_week")
             order_week = row.get("order_week")
 
-            created_service = _create_subcontracted_service_from_form(
+            payload = _build_subcontracted_service_payload(
                 session,
-                client_id=client_id,
                 prestation=prestation_key,
                 budget=row.get("budget"),
                 frequency=frequency_value,
                 custom_frequency_interval=custom_interval,
                 custom_frequency_unit=custom_unit,
                 status=status_value,
-                realization_week=(
-                    realization_week.strip().upper()
-                    if isinstance(realization_week, str)
-                    else realization_week
-                ),
-                order_week=(
-                    order_week.strip().upper()
-                    if isinstance(order_week, str)
-                    else order_week
-                ),
+                realization_week=realization_week,
+                order_week=order_week,
+                subcontracted_lookup=subcontracted_lookup,
             )
-            if created_service:
-                created += 1
+            entries.append((row_number, (client_id, payload)))
         except (HTTPException, ValueError) as exc:
-            session.rollback()
             detail = exc.detail if isinstance(exc, HTTPException) else str(exc)
             errors.append(f"Ligne {row_number} : {detail}")
 
+    created = _insert_import_batches(
+        session, entries, crud.bulk_create_subcontracted_services, errors
+    )
+
     return _store_import_report(
         "/prestations",
         created=created,
@@ -2947,7 +3367,7 @@ def create_supplier(
         SupplierCreate(
             name=normalized_name,
             supplier_type=normalized_type,
-            our_code=(our_code or "").strip() or None,
+            our_code=_clean_optional_text(our_code),
             categories=normalized_categories,
         ),
         contacts=contacts_payload,
@@ -3001,7 +3421,7 @@ def edit_supplier(
         SupplierUpdate(
             name=normalized_name,
             supplier_type=normalized_type,
-            our_code=(our_code or "").strip() or None,
+            our_code=_clean_optional_text(our_code),
             categories=normalized_categories,
         ),
         contacts=contacts_payload,
@@ -3044,9 +3464,9 @@ def add_supplier_contact(
         supplier_id,
         SupplierContactCreate(
             name=normalized_name,
-            email=(email or "").strip() or None,
-            phone=(phone or "").strip() or None,
-            description=(description or "").strip() or None,
+            email=_clean_optional_text(email),
+            phone=_clean_optional_text(phone),
+            description=_clean_optional_text(description),
         ),
     )
     if not created:
@@ -3122,6 +3542,17 @@ def remove_subcontracted_service(
     )
 
 
+def _find_listed_line(session: Session, lines, raw_id: str, fetch):
+    try:
+        line_id = int(raw_id)
+    except ValueError:
+        return None
+    for line in lines:
+        if line.id == line_id:
+            return line
+    return fetch(session, line_id)
+
+
 @app.get("/filtres-courroies", response_class=HTMLResponse)
 def list_filters_and_belts(
     request: Request,
@@ -3140,19 +3571,17 @@ def list_filters_and_belts(
 
     edit_filter_id = request.query_params.get("edit_filter")
     if edit_filter_id:
-        try:
-            editing_filter = crud.get_filter_line(session, int(edit_filter_id))
-        except ValueError:
-            raise HTTPException(status_code=404, detail="Ligne filtre introuvable")
+        editing_filter = _find_listed_line(
+            session, filters, edit_filter_id, crud.get_filter_line
+        )
         if not editing_filter:
             raise HTTPException(status_code=404, detail="Ligne filtre introuvable")
 
     edit_belt_id = request.query_params.get("edit_belt")
     if edit_belt_id:
-        try:
-            editing_belt = crud.get_belt_line(session, int(edit_belt_id))
-        except ValueError:
-            raise HTTPException(status_code=404, detail="Ligne courroie introuvable")
+        editing_belt = _find_listed_line(
+            session, belts, edit_belt_id, crud.get_belt_line
+        )
         if not editing_belt:
             raise HTTPException(status_code=404, detail="Ligne courroie introuvable")
 
@@ -3162,8 +3591,6 @@ def list_filters_and_belts(
             "request": request,
             "filters": filters,
             "belts": belts,
-            "filter_format_options": FILTER_FORMAT_OPTIONS,
-            "filter_format_labels": FILTER_FORMAT_LABELS,
             "import_report": _consume_import_report(request),
             "editing_filter": editing_filter,
             "editing_belt": editing_belt,
@@ -3217,7 +3644,7 @@ def _resolve_client_attachment(
 
 
 @app.get("/taches", response_class=HTMLResponse)
-def tasks_page(request: Request, _current_user: CurrentUser) -> HTMLResponse:
+async def tasks_page(request: Request, _current_user: CurrentUser) -> HTMLResponse:
     return templates.TemplateResponse(
         "taches.html",
         {
@@ -3232,7 +3659,7 @@ def workload_plan(
     _current_user: CurrentUser,
     session: Session = Depends(get_session),
 ) -> HTMLResponse:
-    site_count = len(crud.list_workload_sites(session))
+    site_count = crud.count_workload_sites(session)
     return templates.TemplateResponse(
         "plan_de_charge.html",
         {
@@ -3246,14 +3673,8 @@ class WorkloadPlanSitePayload(BaseModel):
     name: str = Field(..., min_length=1, max_length=255)
 
 
-class WorkloadPlanCellPayload(BaseModel):
-    site_id: int
-    day_index: int
-    value: Optional[str] = None
-
-
 class WorkloadPlanCellsPayload(BaseModel):
-    updates: List[WorkloadPlanCellPayload] = Field(default_factory=list)
+    updates: List[WorkloadCellUpdate] = Field(default_factory=list)
 
 
 class WorkloadPlanImportPayload(BaseModel):
@@ -3266,7 +3687,8 @@ class WorkloadPlanSiteResponse(BaseModel):
     id: int
     name: str
     position: int
-    cells: List[str]
+    # Seules les cases renseignées sont transmises : {jour: valeur}.
+    cells: Dict[int, str]
 
 
 class WorkloadPlanResponse(BaseModel):
@@ -3274,27 +3696,41 @@ class WorkloadPlanResponse(BaseModel):
     sites: List[WorkloadPlanSiteResponse]
 
 
+def _workload_site_cells(site: WorkloadSite) -> Dict[int, str]:
+    return {
+        cell.day_index: cell.value
+        for cell in site.cells
+        if 0 <= cell.day_index < 364 and cell.value
+    }
+
+
 @app.get("/api/workload-plan", response_model=WorkloadPlanResponse)
 def get_workload_plan(
+    request: Request,
     _current_user: CurrentUser,
     session: Session = Depends(get_session),
-) -> WorkloadPlanResponse:
+):
+    state = crud.get_workload_plan_state(session)
+    etag = f'W/"{state.created_at.timestamp():.0f}-{state.version}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
     sites = crud.list_workload_sites(session)
-    payload_sites: List[WorkloadPlanSiteResponse] = []
-    for site in sites:
-        cells = ["" for _ in range(364)]
-        for cell in site.cells:
-            if 0 <= cell.day_index < 364 and cell.value:
-                cells[cell.day_index] = cell.value
-        payload_sites.append(
-            WorkloadPlanSiteResponse(
-                id=site.id,
-                name=site.name,
-                position=site.position,
-                cells=cells,
-            )
-        )
-    return WorkloadPlanResponse(version=1, sites=payload_sites)
+    payload = {
+        "version": 1,
+        "sites": [
+            {
+                "id": site.id,
+                "name": site.name,
+                "position": site.position,
+                "cells": _workload_site_cells(site),
+            }
+            for site in sites
+        ],
+    }
+    return ORJSONResponse(
+        payload,
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+    )
 
 
 @app.post(
@@ -3317,7 +3753,7 @@ def create_workload_plan_site(
         id=site.id,
         name=site.name,
         position=site.position,
-        cells=["" for _ in range(364)],
+        cells={},
     )
 
 
@@ -3336,15 +3772,11 @@ def rename_workload_plan_site(
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     if not site:
         raise HTTPException(status_code=404, detail="Site introuvable")
-    cells = ["" for _ in range(364)]
-    for cell in site.cells:
-        if 0 <= cell.day_index < 364 and cell.value:
-            cells[cell.day_index] = cell.value
     return WorkloadPlanSiteResponse(
         id=site.id,
         name=site.name,
         position=site.position,
-        cells=cells,
+        cells=_workload_site_cells(site),
     )
 
 
@@ -3366,11 +3798,8 @@ def update_workload_plan_cells(
     payload: WorkloadPlanCellsPayload,
     session: Session = Depends(get_session),
 ) -> Dict[str, int]:
-    updates = [
-        WorkloadCellUpdate(**item.model_dump()) for item in payload.updates or []
-    ]
     try:
-        count = crud.bulk_update_workload_cells(session, updates)
+        count = crud.bulk_update_workload_cells(session, payload.updates)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     return {"updated": count}
@@ -3400,21 +3829,16 @@ def export_workload_plan_excel(
 
 
 @app.post("/api/workload-plan/import/excel")
-async def import_workload_plan_excel(
+def import_workload_plan_excel(
     _current_user: CurrentUser,
     file: UploadFile = File(...),
     session: Session = Depends(get_session),
 ) -> Dict[str, int]:
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="Aucun fichier sélectionné.")
-    if not file.filename.lower().endswith(ALLOWED_IMPORT_EXTENSIONS):
-        raise HTTPException(
-            status_code=400,
-            detail="Format de fichier non supporté. Merci d'utiliser un fichier Excel (.xlsx).",
-        )
-    content = await file.read()
+    invalid_file_message = _invalid_import_file_message(file)
+    if invalid_file_message:
+        raise HTTPException(status_code=400, detail=invalid_file_message)
     try:
-        sites, cells = parse_workload_plan_excel(content)
+        sites, cells = parse_workload_plan_excel(file.file)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     count = crud.replace_workload_plan(session, sites, cells)
@@ -3437,7 +3861,7 @@ def _parse_pocket_count(raw: Optional[str] = None) -> Optional[int]:
 
 
 @app.post("/filtres-courroies/filtres")
-async def create_filter_line(
+def create_filter_line(
     _current_user: CurrentUser,
     site: str = Form(...),
     equipment: str = Form(...),
@@ -3467,19 +3891,19 @@ async def create_filter_line(
     )
 
     payload = FilterLineCreate(
-        site=site.strip(),
-        equipment=equipment.strip(),
+        site=site,
+        equipment=equipment,
         client_id=resolved_client_id,
         client_site_id=resolved_client_site_id,
-        efficiency=(efficiency.strip() if efficiency else None),
+        efficiency=efficiency,
         format_type=format_type,
         pocket_count=_validate_pocket_count(
             format_type, _parse_pocket_count(pocket_count)
         ),
-        info_plus=(info_plus.strip() if info_plus else None),
-        dimensions=(dimensions.strip() if dimensions else None),
+        info_plus=info_plus,
+        dimensions=dimensions,
         quantity=quantity,
-        order_week=(order_week.strip().upper() if order_week else None),
+        order_week=order_week,
         included_in_contract=included_in_contract,
         ordered=ordered,
     )
@@ -3488,7 +3912,7 @@ async def create_filter_line(
 
 
 @app.post("/filtres-courroies/filtres/{line_id}/update")
-async def update_filter_line(
+def update_filter_line(
     _current_user: CurrentUser,
     line_id: int,
     site: str = Form(...),
@@ -3522,19 +3946,19 @@ async def update_filter_line(
     )
 
     payload = FilterLineUpdate(
-        site=site.strip(),
-        equipment=equipment.strip(),
+        site=site,
+        equipment=equipment,
         client_id=resolved_client_id,
         client_site_id=resolved_client_site_id,
-        efficiency=(efficiency.strip() if efficiency else None),
+        efficiency=efficiency,
         format_type=format_type,
         pocket_count=_validate_pocket_count(
             format_type, _parse_pocket_count(pocket_count)
         ),
-        info_plus=(info_plus.strip() if info_plus else None),
-        dimensions=(dimensions.strip() if dimensions else None),
+        info_plus=info_plus,
+        dimensions=dimensions,
         quantity=quantity,
-        order_week=(order_week.strip() if order_week else None),
+        order_week=order_week,
         included_in_contract=included_in_contract,
         ordered=ordered,
     )
@@ -3756,73 +4180,21 @@ def bulk_manage_filter_lines(
 
 
 @app.post("/filtres-courroies/filtres/import")
-async def import_filter_lines(
+def import_filter_lines(
     _current_user: CurrentUser,
     file: UploadFile = File(...),
     session: Session = Depends(get_session),
 ):
-    if not file.filename:
-        return _store_import_report(
-            "/filtres-courroies",
-            created=0,
-            total=0,
-            errors=["Aucun fichier sélectionné."],
-            filename="Import filtres",
-            singular_label="ligne filtre",
-            plural_label="lignes filtre",
-        )
-
-    if not file.filename.lower().endswith(ALLOWED_IMPORT_EXTENSIONS):
-        return _store_import_report(
-            "/filtres-courroies",
-            created=0,
-            total=0,
-            errors=[
-                "Format de fichier non supporté. Merci d'utiliser un fichier Excel (.xlsx)."
-            ],
-            filename=file.filename,
-            singular_label="ligne filtre",
-            plural_label="lignes filtre",
-        )
-
-    content = await file.read()
-    try:
-        rows = parse_filter_lines_excel(content)
-    except ValueError as exc:
-        return _store_import_report(
-            "/filtres-courroies",
-            created=0,
-            total=0,
-            errors=[str(exc)],
-            filename=file.filename,
-            singular_label="ligne filtre",
-            plural_label="lignes filtre",
-        )
-
-    created = 0
-    errors: List[str] = []
-    for idx, row in enumerate(rows, start=1):
-        payload = {
-            key: value
-            for key, value in row.items()
-            if not key.startswith("__")
-        }
-        row_number = row.get("__row__", idx)
-        try:
-            crud.create_filter_line(session, FilterLineCreate(**payload))
-            created += 1
-        except Exception as exc:
-            session.rollback()
-            errors.append(f"Ligne {row_number} : {exc}")
-
-    return _store_import_report(
-        "/filtres-courroies",
-        created=created,
-        total=len(rows),
-        errors=errors,
-        filename=file.filename,
+    return _import_model_rows(
+        session,
+        file,
+        redirect_url="/filtres-courroies",
+        default_filename="Import filtres",
         singular_label="ligne filtre",
         plural_label="lignes filtre",
+        parser=parse_filter_lines_excel,
+        model=FilterLineCreate,
+        bulk_create=crud.bulk_create_filter_lines,
     )
 
 
@@ -3838,7 +4210,7 @@ def delete_filter_line(
 
 
 @app.post("/filtres-courroies/courroies")
-async def create_belt_line(
+def create_belt_line(
     _current_user: CurrentUser,
     site: str = Form(...),
     equipment: str = Form(...),
@@ -3858,13 +4230,13 @@ async def create_belt_line(
     )
 
     payload = BeltLineCreate(
-        site=site.strip(),
-        equipment=equipment.strip(),
-        reference=reference.strip(),
+        site=site,
+        equipment=equipment,
+        reference=reference,
         client_id=resolved_client_id,
         client_site_id=resolved_client_site_id,
         quantity=quantity,
-        order_week=(order_week.strip().upper() if order_week else None),
+        order_week=order_week,
         included_in_contract=included_in_contract,
         ordered=ordered,
     )
@@ -3873,7 +4245,7 @@ async def create_belt_line(
 
 
 @app.post("/filtres-courroies/courroies/{line_id}/update")
-async def update_belt_line(
+def update_belt_line(
     _current_user: CurrentUser,
     line_id: int,
     site: str = Form(...),
@@ -3900,13 +4272,13 @@ async def update_belt_line(
     )
 
     payload = BeltLineUpdate(
-        site=site.strip(),
-        equipment=equipment.strip(),
-        reference=reference.strip(),
+        site=site,
+        equipment=equipment,
+        reference=reference,
         client_id=resolved_client_id,
         client_site_id=resolved_client_site_id,
         quantity=quantity,
-        order_week=(order_week.strip() if order_week else None),
+        order_week=order_week,
         included_in_contract=included_in_contract,
         ordered=ordered,
     )
@@ -3930,73 +4302,21 @@ async def update_belt_line(
 
 
 @app.post("/filtres-courroies/courroies/import")
-async def import_belt_lines(
+def import_belt_lines(
     _current_user: CurrentUser,
     file: UploadFile = File(...),
     session: Session = Depends(get_session),
 ):
-    if not file.filename:
-        return _store_import_report(
-            "/filtres-courroies",
-            created=0,
-            total=0,
-            errors=["Aucun fichier sélectionné."],
-            filename="Import courroies",
-            singular_label="ligne courroie",
-            plural_label="lignes courroie",
-        )
-
-    if not file.filename.lower().endswith(ALLOWED_IMPORT_EXTENSIONS):
-        return _store_import_report(
-            "/filtres-courroies",
-            created=0,
-            total=0,
-            errors=[
-                "Format de fichier non supporté. Merci d'utiliser un fichier Excel (.xlsx)."
-            ],
-            filename=file.filename,
-            singular_label="ligne courroie",
-            plural_label="lignes courroie",
-        )
-
-    content = await file.read()
-    try:
-        rows = parse_belt_lines_excel(content)
-    except ValueError as exc:
-        return _store_import_report(
-            "/filtres-courroies",
-            created=0,
-            total=0,
-            errors=[str(exc)],
-            filename=file.filename,
-            singular_label="ligne courroie",
-            plural_label="lignes courroie",
-        )
-
-    created = 0
-    errors: List[str] = []
-    for idx, row in enumerate(rows, start=1):
-        payload = {
-            key: value
-            for key, value in row.items()
-            if not key.startswith("__")
-        }
-        row_number = row.get("__row__", idx)
-        try:
-            crud.create_belt_line(session, BeltLineCreate(**payload))
-            created += 1
-        except Exception as exc:
-            session.rollback()
-            errors.append(f"Ligne {row_number} : {exc}")
-
-    return _store_import_report(
-        "/filtres-courroies",
-        created=created,
-        total=len(rows),
-        errors=errors,
-        filename=file.filename,
+    return _import_model_rows(
+        session,
+        file,
+        redirect_url="/filtres-courroies",
+        default_filename="Import courroies",
         singular_label="ligne courroie",
         plural_label="lignes courroie",
+        parser=parse_belt_lines_excel,
+        model=BeltLineCreate,
+        bulk_create=crud.bulk_create_belt_lines,
     )
 
 
@@ -4012,51 +4332,25 @@ def delete_belt_line(
 
 
 @app.post("/clients/import")
-async def import_clients(
+def import_clients(
     _current_user: CurrentUser,
     file: UploadFile = File(...),
     session: Session = Depends(get_session),
 ):
-    if not file.filename:
-        return _store_import_report(
-            "/",
-            created=0,
-            total=0,
-            errors=["Aucun fichier sélectionné."],
-            filename="Import",
-            singular_label="client",
-            plural_label="clients",
-        )
-
-    if not file.filename.lower().endswith(ALLOWED_IMPORT_EXTENSIONS):
-        return _store_import_report(
-            "/",
-            created=0,
-            total=0,
-            errors=[
-                "Format de fichier non supporté. Merci d'utiliser un fichier Excel (.xlsx)."
-            ],
-            filename=file.filename,
-            singular_label="client",
-            plural_label="clients",
-        )
+    rejection = _reject_import_file(file, "/", "Import", "client", "clients")
+    if rejection:
+        return rejection
 
-    content = await file.read()
     try:
-        rows = parse_clients_excel(content)
+        rows = parse_clients_excel(file.file)
     except ValueError as exc:
-        return _store_import_report(
-            "/",
-            created=0,
-            total=0,
-            errors=[str(exc)],
-            filename=file.filename,
-            singular_label="client",
-            plural_label="clients",
-        )
+        return _import_error("/", file.filename, str(exc), "client", "clients")
 
-    created = 0
     errors: list[str] = []
+    entries: List[Tuple[Any, Tuple[ClientCreate, List[ContactCreate]]]] = []
+    entreprise_cache = crud.get_entreprises_by_names(
+        session, (row.get("company_name") for row in rows)
+    )
     for idx, row in enumerate(rows, start=1):
         contacts_raw = row.get("contacts", [])
         contacts_payload = [ContactCreate(**contact) for contact in contacts_raw]
@@ -4075,23 +4369,23 @@ async def import_clients(
                 statut_bool = _status_to_bool(status_value) if status_value else None
             except HTTPException as exc:
                 raise ValueError(str(exc.detail))
-            entreprise = crud.ensure_entreprise(
-                session,
-                name=company_name,
-                adresse_facturation=payload.get("billing_address"),
-                tag=payload.get("tags"),
-                statut=statut_bool,
-            )
+            with session.begin_nested():
+                entreprise = crud.ensure_entreprise(
+                    session,
+                    name=company_name,
+                    adresse_facturation=payload.get("billing_address"),
+                    tag=payload.get("tags"),
+                    statut=statut_bool,
+                    cache=entreprise_cache,
+                    commit=False,
+                )
             payload["entreprise_id"] = entreprise.id
-            crud.create_client(
-                session,
-                ClientCreate(**payload),
-                contacts=contacts_payload,
-            )
-            created += 1
+            entries.append((row_number, (ClientCreate(**payload), contacts_payload)))
         except Exception as exc:
-            session.rollback()
             errors.append(f"Ligne {row_number} : {exc}")
+    created = _insert_import_batches(
+        session, entries, crud.bulk_create_clients, errors
+    )
 
     return _store_import_report(
         "/",
@@ -4104,24 +4398,53 @@ async def import_clients(
     )
 
 
-def _autofit_sheet(sheet, padding: int = 2, max_width: int = 60) -> None:
-    for column_cells in sheet.columns:
-        max_length = 0
-        column = column_cells[0].column_letter
-        for cell in column_cells:
-            if cell.value:
-                max_length = max(max_length, len(str(cell.value)))
-        sheet.column_dimensions[column].width = min(max_length + padding, max_width)
+def _apply_column_widths(
+    sheet, rows: Iterable[Sequence[Any]], padding: int = 2, max_width: int = 60
+) -> None:
+    widths: List[int] = []
+    for row in rows:
+        if len(row) > len(widths):
+            widths.extend([0] * (len(row) - len(widths)))
+        for index, value in enumerate(row):
+            if value:
+                text = str(value)
+                # Cellules multi-lignes : seule la ligne la plus longue compte.
+                if "\n" in text:
+                    length = max(len(line) for line in text.split("\n"))
+                else:
+                    length = len(text)
+                if length > widths[index]:
+                    widths[index] = length
+    for index, max_length in enumerate(widths, start=1):
+        sheet.column_dimensions[get_column_letter(index)].width = min(
+            max_length + padding, max_width
+        )
+
+
+WORKLOAD_PLAN_LEGEND_ROWS = (
+    ("Valeur", "Signification"),
+    ("4", "Orange — intervention à confirmer (4 h)"),
+    ("8", "Rouge — charge pleine (8 h)"),
+    ("ok:4", "Vert 4 h — retour au vert depuis orange"),
+    ("ok:8", "Vert 8 h — retour au vert depuis rouge"),
+    ("ok", "Vert — intervention validée"),
+    ("(vide)", "Aucune information planifiée pour ce jour."),
+)
+
+WORKLOAD_PLAN_EXPORT_HEADERS = ("Site",) + tuple(
+    f"Jour {index + 1}" for index in range(364)
+)
 
 
 def _build_workload_plan_workbook(sites: Iterable) -> BytesIO:
-    workbook = Workbook()
+    # Mode écriture seule : les lignes sont sérialisées au fil de l'eau.
+    workbook = Workbook(write_only=True)
 
-    sheet = workbook.active
-    sheet.title = "Plan de charge"
+    sheet = workbook.create_sheet("Plan de charge")
+    sheet.freeze_panes = "B2"
+    sheet.column_dimensions["A"].width = 32
 
-    headers = ["Site"] + [f"Jour {index + 1}" for index in range(364)]
-    sheet.append(headers)
+    sheet.append(WORKLOAD_PLAN_EXPORT_HEADERS)
 
     def _export_value(value: Optional[str]) -> Optional[Union[int, str]]:
         if value == "bad":
@@ -4130,26 +4453,20 @@ def _build_workload_plan_workbook(sites: Iterable) -> BytesIO:
             return 4
         return value
 
+    # Les jours vides restent à None : aucune cellule n'est écrite pour eux.
     for site in sites:
-        values: List[Optional[Union[int, str]]] = [""] * 364
+        row: List[Optional[Union[int, str]]] = [None] * 365
+        row[0] = getattr(site, "name", "")
         for cell in getattr(site, "cells", []) or []:
             if cell and 0 <= getattr(cell, "day_index", -1) < 364 and cell.value:
-                values[cell.day_index] = _export_value(cell.value)
-        sheet.append([getattr(site, "name", "")] + values)
-
-    sheet.freeze_panes = "B2"
-    sheet.column_dimensions["A"].width = 32
+                row[cell.day_index + 1] = _export_value(cell.value)
+        sheet.append(row)
 
     legend = workbook.create_sheet("Légende")
-    legend.append(["Valeur", "Signification"])
-    legend.append(["4", "Orange — intervention à confirmer (4 h)"])
-    legend.append(["8", "Rouge — charge pleine (8 h)"])
-    legend.append(["ok:4", "Vert 4 h — retour au vert depuis orange"])
-    legend.append(["ok:8", "Vert 8 h — retour au vert depuis rouge"])
-    legend.append(["ok", "Vert — intervention validée"])
-    legend.append(["(vide)", "Aucune information planifiée pour ce jour."])
     legend.freeze_panes = "A2"
-    _autofit_sheet(legend, padding=4, max_width=55)
+    _apply_column_widths(legend, WORKLOAD_PLAN_LEGEND_ROWS, padding=4, max_width=55)
+    for row in WORKLOAD_PLAN_LEGEND_ROWS:
+        legend.append(row)
 
     buffer = BytesIO()
     workbook.save(buffer)
@@ -4157,11 +4474,14 @@ def _build_workload_plan_workbook(sites: Iterable) -> BytesIO:
     return buffer
 
 
+def _format_option_values(options: Dict[str, str]) -> str:
+    return "\n".join(f"{key} — {label}" for key, label in options.items())
+
+
 def _build_client_import_template() -> BytesIO:
-    workbook = Workbook()
+    workbook = Workbook(write_only=True)
 
-    sheet = workbook.active
-    sheet.title = "Clients"
+    sheet = workbook.create_sheet("Clients")
 
     headers = [
         "company_name",
@@ -4181,7 +4501,7 @@ def _build_client_import_template() -> BytesIO:
         "contact_3_email",
         "contact_3_phone",
     ]
-    sheet.append(headers)
+    rows: List[List[Any]] = [headers]
 
     sample_rows = [
         {
@@ -4230,45 +4550,46 @@ def _build_client_import_template() -> BytesIO:
     ]
 
     for row in sample_rows:
-        sheet.append([row.get(column, "") for column in headers])
+        rows.append([row.get(column, "") for column in headers])
 
     sheet.freeze_panes = "A2"
-    _autofit_sheet(sheet, padding=2, max_width=50)
+    _apply_column_widths(sheet, rows, padding=2, max_width=50)
+    for row in rows:
+        sheet.append(row)
 
     options_sheet = workbook.create_sheet("Options")
-    options_sheet.append(["Champ", "Valeurs autorisées", "Description"])
     options_sheet.freeze_panes = "A2"
+    options_rows: List[List[Any]] = [["Champ", "Valeurs autorisées", "Description"]]
 
-    def _format_options(options: Dict[str, str]) -> str:
-        return "\n".join(f"{key} — {label}" for key, label in options.items())
-
-    options_sheet.append([
+    options_rows.append([
         "depannage",
-        _format_options(DEPANNAGE_OPTIONS),
+        _format_option_values(DEPANNAGE_OPTIONS),
         "Détermine si les interventions sont refacturées.",
     ])
-    options_sheet.append([
+    options_rows.append([
         "astreinte",
-        _format_options(ASTREINTE_OPTIONS),
+        _format_option_values(ASTREINTE_OPTIONS),
         "Choisissez le type d'astreinte applicable.",
     ])
-    options_sheet.append([
+    options_rows.append([
         "technician_name",
         "Nom complet",
         "Identifie le technicien référent pour ce client.",
     ])
-    options_sheet.append([
+    options_rows.append([
         "status",
-        _format_options(STATUS_OPTIONS),
+        _format_option_values(STATUS_OPTIONS),
         "Etat du client dans votre CRM.",
     ])
-    options_sheet.append([
+    options_rows.append([
         "contacts supplémentaires",
         "contact_2_name, contact_2_email, contact_2_phone, contact_3_name…",
         "Dupliquez le numéro (contact_4_*, contact_5_* …) pour ajouter des contacts additionnels. Seul le nom est obligatoire.",
     ])
 
-    _autofit_sheet(options_sheet, padding=4, max_width=70)
+    _apply_column_widths(options_sheet, options_rows, padding=4, max_width=70)
+    for row in options_rows:
+        options_sheet.append(row)
 
     buffer = BytesIO()
     workbook.save(buffer)
@@ -4277,10 +4598,9 @@ def _build_client_import_template() -> BytesIO:
 
 
 def _build_supplier_import_template() -> BytesIO:
-    workbook = Workbook()
+    workbook = Workbook(write_only=True)
 
-    sheet = workbook.active
-    sheet.title = "Fournisseurs"
+    sheet = workbook.create_sheet("Fournisseurs")
 
     headers = [
         "name",
@@ -4294,7 +4614,7 @@ def _build_supplier_import_template() -> BytesIO:
         "contact_2_email",
         "contact_2_phone",
     ]
-    sheet.append(headers)
+    rows: List[List[Any]] = [headers]
 
     sample_rows = [
         {
@@ -4320,35 +4640,36 @@ def _build_supplier_import_template() -> BytesIO:
     ]
 
     for row in sample_rows:
-        sheet.append([row.get(column, "") for column in headers])
+        rows.append([row.get(column, "") for column in headers])
 
     sheet.freeze_panes = "A2"
-    _autofit_sheet(sheet, padding=2, max_width=50)
+    _apply_column_widths(sheet, rows, padding=2, max_width=50)
+    for row in rows:
+        sheet.append(row)
 
     options_sheet = workbook.create_sheet("Options")
-    options_sheet.append(["Champ", "Valeurs autorisées", "Description"])
     options_sheet.freeze_panes = "A2"
+    options_rows: List[List[Any]] = [["Champ", "Valeurs autorisées", "Description"]]
 
-    def _format_options(options: Dict[str, str]) -> str:
-        return "\n".join(f"{key} — {label}" for key, label in options.items())
-
-    options_sheet.append([
+    options_rows.append([
         "supplier_type",
-        _format_options(SUPPLIER_TYPE_OPTIONS),
+        _format_option_values(SUPPLIER_TYPE_OPTIONS),
         "Choisissez s'il s'agit d'un fournisseur ou d'un sous-traitant.",
     ])
-    options_sheet.append([
+    options_rows.append([
         "categories",
         "Liste séparée par des virgules",
         "Exemples: Analyse d'eau, Etiquettes, Détection CO…",
     ])
-    options_sheet.append([
+    options_rows.append([
         "contacts supplémentaires",
         "contact_3_name, contact_3_email, contact_3_phone…",
         "Dupliquez le numéro pour ajouter plus de contacts. Seul le nom est obligatoire.",
     ])
 
-    _autofit_sheet(options_sheet, padding=4, max_width=70)
+    _apply_column_widths(options_sheet, options_rows, padding=4, max_width=70)
+    for row in options_rows:
+        options_sheet.append(row)
 
     buffer = BytesIO()
     workbook.save(buffer)
@@ -4357,10 +4678,9 @@ def _build_supplier_import_template() -> BytesIO:
 
 
 def _build_supplier_export_workbook(suppliers) -> BytesIO:
-    workbook = Workbook()
+    workbook = Workbook(write_only=True)
 
-    sheet = workbook.active
-    sheet.title = "Fournisseurs"
+    sheet = workbook.create_sheet("Fournisseurs")
 
     max_contacts = max((len(getattr(supplier, "contacts", []) or []) for supplier in suppliers), default=0)
     contact_slots = max(1, max_contacts)
@@ -4371,7 +4691,7 @@ def _build_supplier_export_workbook(suppliers) -> BytesIO:
             f"contact_{index}_email",
             f"contact_{index}_phone",
         ])
-    sheet.append(headers)
+    rows: List[List[Any]] = [headers]
 
     for supplier in suppliers:
         contact_list = sorted(getattr(supplier, "contacts", []) or [], key=lambda c: c.name or "")
@@ -4390,10 +4710,12 @@ def _build_supplier_export_workbook(suppliers) -> BytesIO:
                     getattr(contact, "phone", "") if contact else "",
                 ]
             )
-        sheet.append(base_row)
+        rows.append(base_row)
 
     sheet.freeze_panes = "A2"
-    _autofit_sheet(sheet, padding=2, max_width=55)
+    _apply_column_widths(sheet, rows, padding=2, max_width=55)
+    for row in rows:
+        sheet.append(row)
 
     buffer = BytesIO()
     workbook.save(buffer)
@@ -4402,10 +4724,9 @@ def _build_supplier_export_workbook(suppliers) -> BytesIO:
 
 
 def _build_prestation_import_template() -> BytesIO:
-    workbook = Workbook()
+    workbook = Workbook(write_only=True)
 
-    sheet = workbook.active
-    sheet.title = "Prestations"
+    sheet = workbook.create_sheet("Prestations")
 
     headers = [
         "company_name",
@@ -4421,7 +4742,7 @@ def _build_prestation_import_template() -> BytesIO:
         "order_week",
         "realization_week",
     ]
-    sheet.append(headers)
+    rows: List[List[Any]] = [headers]
 
     sample_rows = [
         {
@@ -4452,44 +4773,44 @@ def _build_prestation_import_template() -> BytesIO:
     ]
 
     for row in sample_rows:
-        sheet.append([row.get(column, "") for column in headers])
+        rows.append([row.get(column, "") for column in headers])
 
     sheet.freeze_panes = "A2"
-    _autofit_sheet(sheet, padding=2, max_width=40)
+    _apply_column_widths(sheet, rows, padding=2, max_width=40)
+    for row in rows:
+        sheet.append(row)
 
     options_sheet = workbook.create_sheet("Options")
-    options_sheet.append(["Champ", "Valeurs autorisées", "Description"])
     options_sheet.freeze_panes = "A2"
+    options_rows: List[List[Any]] = [["Champ", "Valeurs autorisées", "Description"]]
 
-    status_values = "\n".join(
-        f"{key} — {label}" for key, label in SUBCONTRACT_STATUS_OPTIONS.items()
-    )
+    status_values = _format_option_values(SUBCONTRACT_STATUS_OPTIONS)
     frequency_values = "\n".join(
         f"{key} — {data['label']}" for key, data in PREDEFINED_FREQUENCIES.items()
     )
 
-    options_sheet.append(
+    options_rows.append(
         [
             "prestation",
             "Clé interne du référentiel",
             "Utilisez la colonne Prestation ou renseignez uniquement le libellé dans prestation_label.",
         ]
     )
-    options_sheet.append(
+    options_rows.append(
         [
             "frequency",
             frequency_values,
             "Utilisez custom_interval ou un format interval:unite:valeur pour les fréquences personnalisées.",
         ]
     )
-    options_sheet.append(
+    options_rows.append(
         [
             "status",
             status_values,
             "Statut opérationnel appliqué à la ligne importée.",
         ]
     )
-    options_sheet.append(
+    options_rows.append(
         [
             "frequency_unit",
             "months — mois\nyears — années",
@@ -4497,7 +4818,9 @@ def _build_prestation_import_template() -> BytesIO:
         ]
     )
 
-    _autofit_sheet(options_sheet, padding=4, max_width=70)
+    _apply_column_widths(options_sheet, options_rows, padding=4, max_width=70)
+    for row in options_rows:
+        options_sheet.append(row)
 
     buffer = BytesIO()
     workbook.save(buffer)
@@ -4508,17 +4831,16 @@ def _build_prestation_import_template() -> BytesIO:
 def _build_prestation_reference_export(
     definitions: Iterable[PrestationDefinition],
 ) -> BytesIO:
-    workbook = Workbook()
+    workbook = Workbook(write_only=True)
 
-    sheet = workbook.active
-    sheet.title = "Référentiel"
+    sheet = workbook.create_sheet("Référentiel")
 
     headers = [
         "Libellé prestation",
         "Code budget",
         "Catégorie",
     ]
-    sheet.append(headers)
+    rows: List[List[Any]] = [headers]
 
     sorted_definitions = sorted(
         definitions,
@@ -4529,7 +4851,7 @@ def _build_prestation_reference_export(
     )
 
     for definition in sorted_definitions:
-        sheet.append(
+        rows.append(
             [
                 getattr(definition, "label", ""),
                 getattr(definition, "budget_code", ""),
@@ -4538,7 +4860,9 @@ def _build_prestation_reference_export(
         )
 
     sheet.freeze_panes = "A2"
-    _autofit_sheet(sheet, padding=2, max_width=45)
+    _apply_column_widths(sheet, rows, padding=2, max_width=45)
+    for row in rows:
+        sheet.append(row)
 
     buffer = BytesIO()
     workbook.save(buffer)
@@ -4550,10 +4874,9 @@ def _build_subcontracted_services_export(
     services: Iterable,
     frequency_labels: Dict[str, str],
 ) -> BytesIO:
-    workbook = Workbook()
+    workbook = Workbook(write_only=True)
 
-    sheet = workbook.active
-    sheet.title = "Prestations"
+    sheet = workbook.create_sheet("Prestations")
 
     headers = [
         "Libellé prestation",
@@ -4567,7 +4890,7 @@ def _build_subcontracted_services_export(
         "Semaine commande",
         "Semaine réalisation",
     ]
-    sheet.append(headers)
+    rows: List[List[Any]] = [headers]
 
     for service in services:
         client = getattr(service, "client", None)
@@ -4586,7 +4909,7 @@ def _build_subcontracted_services_export(
             getattr(service, "status", None), getattr(service, "status", "")
         )
 
-        sheet.append(
+        rows.append(
             [
                 getattr(service, "prestation_label", ""),
                 company_name,
@@ -4602,7 +4925,9 @@ def _build_subcontracted_services_export(
         )
 
     sheet.freeze_panes = "A2"
-    _autofit_sheet(sheet, padding=2, max_width=55)
+    _apply_column_widths(sheet, rows, padding=2, max_width=55)
+    for row in rows:
+        sheet.append(row)
 
     buffer = BytesIO()
     workbook.save(buffer)
@@ -4611,10 +4936,9 @@ def _build_subcontracted_services_export(
 
 
 def _build_filter_import_template() -> BytesIO:
-    workbook = Workbook()
+    workbook = Workbook(write_only=True)
 
-    sheet = workbook.active
-    sheet.title = "Filtres"
+    sheet = workbook.create_sheet("Filtres")
 
     headers = [
         "site",
@@ -4629,7 +4953,7 @@ def _build_filter_import_template() -> BytesIO:
         "included_in_contract",
         "ordered",
     ]
-    sheet.append(headers)
+    rows: List[List[Any]] = [headers]
 
     sample_rows = [
         {
@@ -4661,19 +4985,23 @@ def _build_filter_import_template() -> BytesIO:
     ]
 
     for row in sample_rows:
-        sheet.append([row.get(column, "") for column in headers])
+        rows.append([row.get(column, "") for column in headers])
 
     sheet.freeze_panes = "A2"
-    _autofit_sheet(sheet, padding=2, max_width=55)
+    _apply_column_widths(sheet, rows, padding=2, max_width=55)
+    for row in rows:
+        sheet.append(row)
 
     options_sheet = workbook.create_sheet("Options")
-    options_sheet.append(["format_type", "Libellé"])
     options_sheet.freeze_panes = "A2"
+    options_rows: List[List[Any]] = [["format_type", "Libellé"]]
 
     for value, label in FILTER_FORMAT_OPTIONS:
-        options_sheet.append([value, label])
+        options_rows.append([value, label])
 
-    _autofit_sheet(options_sheet, padding=4, max_width=50)
+    _apply_column_widths(options_sheet, options_rows, padding=4, max_width=50)
+    for row in options_rows:
+        options_sheet.append(row)
 
     buffer = BytesIO()
     workbook.save(buffer)
@@ -4682,10 +5010,9 @@ def _build_filter_import_template() -> BytesIO:
 
 
 def _build_belt_export_workbook(lines: Iterable) -> BytesIO:
-    workbook = Workbook()
+    workbook = Workbook(write_only=True)
 
-    sheet = workbook.active
-    sheet.title = "Courroies"
+    sheet = workbook.create_sheet("Courroies")
 
     headers = [
         "Site",
@@ -4696,10 +5023,10 @@ def _build_belt_export_workbook(lines: Iterable) -> BytesIO:
         "Inclus contrat",
         "État commande",
     ]
-    sheet.append(headers)
+    rows: List[List[Any]] = [headers]
 
     for line in lines:
-        sheet.append(
+        rows.append(
             [
                 getattr(line, "site", ""),
                 getattr(line, "equipment", ""),
@@ -4712,7 +5039,9 @@ def _build_belt_export_workbook(lines: Iterable) -> BytesIO:
         )
 
     sheet.freeze_panes = "A2"
-    _autofit_sheet(sheet, padding=2, max_width=40)
+    _apply_column_widths(sheet, rows, padding=2, max_width=40)
+    for row in rows:
+        sheet.append(row)
 
     buffer = BytesIO()
     workbook.save(buffer)
@@ -4721,10 +5050,9 @@ def _build_belt_export_workbook(lines: Iterable) -> BytesIO:
 
 
 def _build_filter_export_workbook(lines: Iterable) -> BytesIO:
-    workbook = Workbook()
+    workbook = Workbook(write_only=True)
 
-    sheet = workbook.active
-    sheet.title = "Filtres"
+    sheet = workbook.create_sheet("Filtres")
 
     headers = [
         "Site",
@@ -4739,14 +5067,14 @@ def _build_filter_export_workbook(lines: Iterable) -> BytesIO:
         "Inclus contrat",
         "État commande",
     ]
-    sheet.append(headers)
+    rows: List[List[Any]] = [headers]
 
     for line in lines:
         format_label = FILTER_FORMAT_LABELS.get(
             getattr(line, "format_type", None), getattr(line, "format_type", "")
         )
         pocket_count = getattr(line, "pocket_count", None)
-        sheet.append(
+        rows.append(
             [
                 getattr(line, "site", ""),
                 getattr(line, "equipment", ""),
@@ -4763,7 +5091,9 @@ def _build_filter_export_workbook(lines: Iterable) -> BytesIO:
         )
 
     sheet.freeze_panes = "A2"
-    _autofit_sheet(sheet, padding=2, max_width=45)
+    _apply_column_widths(sheet, rows, padding=2, max_width=45)
+    for row in rows:
+        sheet.append(row)
 
     buffer = BytesIO()
     workbook.save(buffer)
@@ -4772,10 +5102,9 @@ def _build_filter_export_workbook(lines: Iterable) -> BytesIO:
 
 
 def _build_belt_import_template() -> BytesIO:
-    workbook = Workbook()
+    workbook = Workbook(write_only=True)
 
-    sheet = workbook.active
-    sheet.title = "Courroies"
+    sheet = workbook.create_sheet("Courroies")
 
     headers = [
         "site",
@@ -4786,7 +5115,7 @@ def _build_belt_import_template() -> BytesIO:
         "included_in_contract",
         "ordered",
     ]
-    sheet.append(headers)
+    rows: List[List[Any]] = [headers]
 
     sample_rows = [
         {
@@ -4819,10 +5148,12 @@ def _build_belt_import_template() -> BytesIO:
     ]
 
     for row in sample_rows:
-        sheet.append([row.get(column, "") for column in headers])
+        rows.append([row.get(column, "") for column in headers])
 
     sheet.freeze_panes = "A2"
-    _autofit_sheet(sheet, padding=2, max_width=55)
+    _apply_column_widths(sheet, rows, padding=2, max_width=55)
+    for row in rows:
+        sheet.append(row)
 
     buffer = BytesIO()
     workbook.save(buffer)
@@ -4830,8 +5161,61 @@ def _build_belt_import_template() -> BytesIO:
     return buffer
 
 
-def _template_response(buffer: BytesIO, filename: str) -> Response:
+def _precompressed(buffer: BytesIO) -> Tuple[bytes, bytes]:
     content = buffer.getvalue()
+    return content, gzip.compress(content, compresslevel=6)
+
+
+CLIENT_IMPORT_TEMPLATE = _precompressed(_build_client_import_template())
+SUPPLIER_IMPORT_TEMPLATE = _precompressed(_build_supplier_import_template())
+PRESTATION_IMPORT_TEMPLATE = _precompressed(_build_prestation_import_template())
+FILTER_IMPORT_TEMPLATE = _precompressed(_build_filter_import_template())
+BELT_IMPORT_TEMPLATE = _precompressed(_build_belt_import_template())
+
+
+_prestation_reference_export_cache: Dict[tuple, bytes] = {}
+
+
+def _get_prestation_reference_export(session: Session) -> bytes:
+    return _fingerprint_cached(
+        _prestation_reference_export_cache,
+        crud.get_prestation_definitions_fingerprint(session),
+        lambda: _build_prestation_reference_export(
+            crud.list_prestation_definitions(session)
+        ).getvalue(),
+    )
+
+
+def _accepts_gzip(request: Request) -> bool:
+    for part in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.partition(";")
+        if coding.strip().lower() != "gzip":
+            continue
+        quality = params.replace(" ", "").lower()
+        if not quality.startswith("q="):
+            return True
+        try:
+            return float(quality[2:]) > 0
+        except ValueError:
+            return False
+    return False
+
+
+def _static_template_response(
+    request: Request, template: Tuple[bytes, bytes], filename: str
+) -> Response:
+    content, compressed = template
+    if not _accepts_gzip(request):
+        response = _template_response(content, filename)
+    else:
+        response = _template_response(compressed, filename)
+        response.headers["Content-Encoding"] = "gzip"
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+
+def _template_response(buffer: Union[BytesIO, bytes], filename: str) -> Response:
+    content = buffer if isinstance(buffer, bytes) else buffer.getvalue()
     headers_dict = {
         "Content-Disposition": (
             f"attachment; filename={filename}; "
@@ -4847,17 +5231,17 @@ def _template_response(buffer: BytesIO, filename: str) -> Response:
 
 @app.get("/clients/import/template")
 @app.get("/clients/import/template/")
-def download_client_import_template(_current_user: CurrentUser):
-    return _template_response(
-        _build_client_import_template(), "modele_import_clients.xlsx"
+async def download_client_import_template(request: Request, _current_user: CurrentUser):
+    return _static_template_response(
+        request, CLIENT_IMPORT_TEMPLATE, "modele_import_clients.xlsx"
     )
 
 
 @app.get("/prestations/import/template")
 @app.get("/prestations/import/template/")
-def download_prestation_import_template(_current_user: CurrentUser):
-    return _template_response(
-        _build_prestation_import_template(), "modele_import_prestations.xlsx"
+async def download_prestation_import_template(request: Request, _current_user: CurrentUser):
+    return _static_template_response(
+        request, PRESTATION_IMPORT_TEMPLATE, "modele_import_prestations.xlsx"
     )
 
 
@@ -4908,24 +5292,22 @@ def download_subcontracted_services(
 def download_prestation_reference(
     _current_user: CurrentUser, session: Session = Depends(get_session)
 ):
-    definitions = crud.list_prestation_definitions(session)
     return _template_response(
-        _build_prestation_reference_export(definitions),
-        "referentiel_prestations.xlsx",
+        _get_prestation_reference_export(session), "referentiel_prestations.xlsx"
     )
 
 
 @app.get("/filtres-courroies/filtres/import/template")
 @app.get("/filtres-courroies/filtres/import/template/")
-def download_filter_import_template(_current_user: CurrentUser):
-    return _template_response(
-        _build_filter_import_template(), "modele_import_filtres.xlsx"
+async def download_filter_import_template(request: Request, _current_user: CurrentUser):
+    return _static_template_response(
+        request, FILTER_IMPORT_TEMPLATE, "modele_import_filtres.xlsx"
     )
 
 
 @app.get("/filtres-courroies/courroies/import/template")
 @app.get("/filtres-courroies/courroies/import/template/")
-def download_belt_import_template(_current_user: CurrentUser):
-    return _template_response(
-        _build_belt_import_template(), "modele_import_courroies.xlsx"
+async def download_belt_import_template(request: Request, _current_user: CurrentUser):
+    return _static_template_response(
+        request, BELT_IMPORT_TEMPLATE, "modele_import_courroies.xlsx"
     )
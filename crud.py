@@ -1,9 +1,11 @@
-from typing import Dict, Iterable, List, Optional, Sequence
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
+import json
 import re
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from sqlalchemy import delete, func, or_
+from sqlalchemy import delete, func, or_, tuple_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
 
@@ -30,6 +32,7 @@ from models import (
     FilterLine,
     FilterLineCreate,
     FilterLineUpdate,
+    ImportReport,
     PrestationDefinition,
     PrestationDefinitionCreate,
     PrestationDefinitionUpdate,
@@ -42,12 +45,20 @@ from models import (
     UserLoginEvent,
     WorkloadCell,
     WorkloadCellUpdate,
+    WorkloadPlanState,
+    WORKLOAD_PLAN_STATE_ID,
     WorkloadSite,
     WorkloadSiteCreate,
     WorkloadSiteUpdate,
 )
 
 
+IMPORT_REPORT_TTL = timedelta(minutes=10)
+WORKLOAD_CELL_BATCH_SIZE = 500
+WEEK_NUMBER_RE = re.compile(r"(\d{1,2})")
+DIMENSION_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)?")
+
+
 def list_prestation_definitions(session: Session) -> List[PrestationDefinition]:
     stmt = (
         select(PrestationDefinition)
@@ -60,6 +71,15 @@ def list_prestation_definitions(session: Session) -> List[PrestationDefinition]:
     return session.exec(stmt).all()
 
 
+def get_prestation_definitions_fingerprint(session: Session) -> tuple:
+    stmt = select(
+        func.count(PrestationDefinition.id),
+        func.max(PrestationDefinition.id),
+        func.max(PrestationDefinition.updated_at),
+    )
+    return tuple(session.exec(stmt).one())
+
+
 def get_prestation_definition(
     session: Session, definition_id: int
 ) -> Optional[PrestationDefinition]:
@@ -144,11 +164,35 @@ def get_entreprise_by_name(session: Session, name: str) -> Optional[Entreprise]:
     return session.exec(stmt).first()
 
 
+def get_entreprises_by_names(
+    session: Session, names: Iterable[Optional[str]]
+) -> Dict[str, Entreprise]:
+    normalized = {name.strip() for name in names if name and name.strip()}
+    if not normalized:
+        return {}
+    stmt = select(Entreprise).where(Entreprise.nom.in_(normalized))
+    return {entreprise.nom: entreprise for entreprise in session.exec(stmt).all()}
+
+
 def list_entreprises(session: Session) -> List[Entreprise]:
     stmt = select(Entreprise).order_by(Entreprise.nom.asc())
     return session.exec(stmt).all()
 
 
+def list_entreprise_names(session: Session) -> List[str]:
+    stmt = select(Entreprise.nom).order_by(Entreprise.nom.asc())
+    return session.exec(stmt).all()
+
+
+def get_entreprises_fingerprint(session: Session) -> tuple:
+    stmt = select(
+        func.count(Entreprise.id),
+        func.max(Entreprise.id),
+        func.max(Entreprise.updated_at),
+    )
+    return tuple(session.exec(stmt).one())
+
+
 def create_entreprise(session: Session, data: EntrepriseCreate) -> Entreprise:
     entreprise = Entreprise.model_validate(data)
     session.add(entreprise)
@@ -179,9 +223,15 @@ def ensure_entreprise(
     adresse_facturation: Optional[str] = None,
     tag: Optional[str] = None,
     statut: Optional[bool] = None,
+    cache: Optional[Dict[str, Entreprise]] = None,
+    commit: bool = True,
 ) -> Entreprise:
+    # Le cache, préchargé avec tous les noms de l'import, fait foi.
     normalized = name.strip()
-    entreprise = get_entreprise_by_name(session, normalized)
+    if cache is not None:
+        entreprise = cache.get(normalized)
+    else:
+        entreprise = get_entreprise_by_name(session, normalized)
     payload = {}
     if adresse_facturation is not None:
         payload["adresse_facturation"] = adresse_facturation or None
@@ -191,19 +241,33 @@ def ensure_entreprise(
         payload["statut"] = statut
 
     if entreprise:
-        if payload:
-            update = EntrepriseUpdate(**payload)
-            update_entreprise(session, entreprise.id, update)
-            session.refresh(entreprise)
-        return entreprise
-
-    create_payload = EntrepriseCreate(
-        nom=normalized,
-        adresse_facturation=payload.get("adresse_facturation"),
-        tag=payload.get("tag"),
-        statut=payload.get("statut", True),
-    )
-    entreprise = create_entreprise(session, create_payload)
+        changes = {
+            key: value
+            for key, value in payload.items()
+            if getattr(entreprise, key) != value
+        }
+        if changes and commit:
+            update_entreprise(session, entreprise.id, EntrepriseUpdate(**changes))
+        elif changes:
+            for key, value in changes.items():
+                setattr(entreprise, key, value)
+            session.add(entreprise)
+    else:
+        create_payload = EntrepriseCreate(
+            nom=normalized,
+            adresse_facturation=payload.get("adresse_facturation"),
+            tag=payload.get("tag"),
+            statut=payload.get("statut", True),
+        )
+        if commit:
+            entreprise = create_entreprise(session, create_payload)
+        else:
+            entreprise = Entreprise.model_validate(create_payload)
+            session.add(entreprise)
+            session.flush()
+
+    if cache is not None:
+        cache[normalized] = entreprise
     return entreprise
 
 
@@ -310,16 +374,21 @@ def find_clients_for_import(
 def get_client(session: Session, client_id: int) -> Optional[Client]:
     return session.get(Client, client_id)
 
-def create_client(
-    session: Session,
-    data: ClientCreate,
-    contacts: Optional[List[ContactCreate]] = None,
-) -> Client:
+def _build_client(session: Session, data: ClientCreate) -> Client:
     c = Client.model_validate(data)
     if c.entreprise_id:
         entreprise = session.get(Entreprise, c.entreprise_id)
         if entreprise:
             c.company_name = entreprise.nom
+    return c
+
+
+def create_client(
+    session: Session,
+    data: ClientCreate,
+    contacts: Optional[List[ContactCreate]] = None,
+) -> Client:
+    c = _build_client(session, data)
     session.add(c)
     session.flush()
 
@@ -331,6 +400,22 @@ def create_client(
     session.refresh(c)
     return c
 
+
+def bulk_create_clients(
+    session: Session,
+    items: Sequence[Tuple[ClientCreate, List[ContactCreate]]],
+) -> int:
+    records = [_build_client(session, data) for data, _ in items]
+    session.add_all(records)
+    session.flush()
+    session.add_all(
+        Contact(client_id=record.id, **contact_data.model_dump())
+        for record, (_, contacts) in zip(records, items)
+        for contact_data in contacts
+    )
+    session.flush()
+    return len(records)
+
 def update_client(session: Session, client_id: int, data: ClientUpdate) -> Optional[Client]:
     c = session.get(Client, client_id)
     if not c: return None
@@ -460,6 +545,22 @@ def create_supplier(
     return supplier
 
 
+def bulk_create_suppliers(
+    session: Session,
+    items: Sequence[Tuple[SupplierCreate, List[SupplierContactCreate]]],
+) -> int:
+    records = [Supplier.model_validate(data) for data, _ in items]
+    session.add_all(records)
+    session.flush()
+    session.add_all(
+        SupplierContact(supplier_id=record.id, **contact_data.model_dump())
+        for record, (_, contacts) in zip(records, items)
+        for contact_data in contacts
+    )
+    session.flush()
+    return len(records)
+
+
 def update_supplier(
     session: Session,
     supplier_id: int,
@@ -691,6 +792,17 @@ def create_subcontracted_service(
     return record
 
 
+def bulk_create_subcontracted_services(
+    session: Session, items: Sequence[Tuple[int, SubcontractedServiceCreate]]
+) -> int:
+    session.add_all(
+        SubcontractedService(client_id=client_id, **data.model_dump())
+        for client_id, data in items
+    )
+    session.flush()
+    return len(items)
+
+
 def delete_subcontracted_service(
     session: Session, client_id: int, service_id: int
 ) -> bool:
@@ -702,6 +814,30 @@ def delete_subcontracted_service(
     return True
 
 
+def get_workload_plan_state(session: Session) -> WorkloadPlanState:
+    # La ligne est créée par init_db : la lecture ne fait jamais d'écriture.
+    state = session.get(WorkloadPlanState, WORKLOAD_PLAN_STATE_ID)
+    if not state:
+        return WorkloadPlanState(id=WORKLOAD_PLAN_STATE_ID)
+    return state
+
+
+def _bump_workload_plan_version(session: Session) -> None:
+    result = session.exec(
+        update(WorkloadPlanState)
+        .where(WorkloadPlanState.id == WORKLOAD_PLAN_STATE_ID)
+        .values(version=WorkloadPlanState.version + 1)
+    )
+    if not result.rowcount:
+        session.exec(
+            sqlite_insert(WorkloadPlanState)
+            .values(
+                id=WORKLOAD_PLAN_STATE_ID, version=1, created_at=datetime.utcnow()
+            )
+            .on_conflict_do_nothing(index_elements=["id"])
+        )
+
+
 def list_workload_sites(session: Session) -> List[WorkloadSite]:
     stmt = (
         select(WorkloadSite)
@@ -711,6 +847,10 @@ def list_workload_sites(session: Session) -> List[WorkloadSite]:
     return session.exec(stmt).all()
 
 
+def count_workload_sites(session: Session) -> int:
+    return session.exec(select(func.count(WorkloadSite.id))).one()
+
+
 def create_workload_site(session: Session, data: WorkloadSiteCreate) -> WorkloadSite:
     normalized = data.name.strip()
     if not normalized:
@@ -732,6 +872,7 @@ def create_workload_site(session: Session, data: WorkloadSiteCreate) -> Workload
 
     site = WorkloadSite(name=normalized, position=position)
     session.add(site)
+    _bump_workload_plan_version(session)
     session.commit()
     session.refresh(site)
     return site
@@ -764,6 +905,7 @@ def rename_workload_site(
         site.position = updates["position"]
 
     session.add(site)
+    _bump_workload_plan_version(session)
     session.commit()
     session.refresh(site)
     return site
@@ -774,6 +916,7 @@ def delete_workload_site(session: Session, site_id: int) -> bool:
     if not site:
         return False
     session.delete(site)
+    _bump_workload_plan_version(session)
     session.commit()
     return True
 
@@ -796,29 +939,40 @@ def bulk_update_workload_cells(
     if missing:
         raise ValueError("Site introuvable")
 
+    values: Dict[Tuple[int, int], str] = {}
     for item in items:
         if not 0 <= item.day_index < 364:
             raise ValueError("Indice de jour invalide")
+        values[(item.site_id, item.day_index)] = (item.value or "").strip()
 
-        normalized = (item.value or "").strip()
-        cell = session.exec(
-            select(WorkloadCell)
-            .where(WorkloadCell.site_id == item.site_id)
-            .where(WorkloadCell.day_index == item.day_index)
-        ).first()
+    filled = [
+        {"site_id": site_id, "day_index": day_index, "value": value}
+        for (site_id, day_index), value in values.items()
+        if value
+    ]
+    cleared = [key for key, value in values.items() if not value]
 
-        if normalized:
-            if cell:
-                cell.value = normalized
-            else:
-                cell = WorkloadCell(
-                    site_id=item.site_id, day_index=item.day_index, value=normalized
+    # Découpage pour rester sous la limite de paramètres SQLite.
+    for start in range(0, len(filled), WORKLOAD_CELL_BATCH_SIZE):
+        stmt = sqlite_insert(WorkloadCell).values(
+            filled[start : start + WORKLOAD_CELL_BATCH_SIZE]
+        )
+        session.exec(
+            stmt.on_conflict_do_update(
+                index_elements=["site_id", "day_index"],
+                set_={"value": stmt.excluded.value},
+            )
+        )
+    for start in range(0, len(cleared), WORKLOAD_CELL_BATCH_SIZE):
+        session.exec(
+            delete(WorkloadCell).where(
+                tuple_(WorkloadCell.site_id, WorkloadCell.day_index).in_(
+                    cleared[start : start + WORKLOAD_CELL_BATCH_SIZE]
                 )
-                session.add(cell)
-        else:
-            if cell:
-                session.delete(cell)
+            )
+        )
 
+    _bump_workload_plan_version(session)
     session.commit()
     return len(items)
 
@@ -836,6 +990,7 @@ def replace_workload_plan(
 
     session.exec(delete(WorkloadCell))
     session.exec(delete(WorkloadSite))
+    _bump_workload_plan_version(session)
     session.commit()
 
     created = 0
@@ -864,6 +1019,7 @@ def replace_workload_plan(
 
         created += 1
 
+    _bump_workload_plan_version(session)
     session.commit()
     return created
 
@@ -925,6 +1081,38 @@ def list_subcontracted_services(
     return records
 
 
+def get_clients_fingerprint(session: Session) -> tuple:
+    columns = []
+    for model in (Client, Entreprise, SubcontractedService, PrestationDefinition):
+        columns.append(select(func.count(model.id)).scalar_subquery())
+        columns.append(select(func.max(model.updated_at)).scalar_subquery())
+    for model in (Contact, ClientSite):
+        columns.append(select(func.count(model.id)).scalar_subquery())
+        columns.append(select(func.max(model.id)).scalar_subquery())
+        # SQLite réutilise le plus grand rowid supprimé : max(id) ne suffit pas.
+        columns.append(select(func.max(model.created_at)).scalar_subquery())
+    return tuple(session.exec(select(*columns)).one())
+
+
+def get_subcontracting_fingerprint(session: Session) -> tuple:
+    columns = []
+    for model in (
+        SubcontractedService,
+        Client,
+        Entreprise,
+        Supplier,
+        PrestationDefinition,
+    ):
+        columns.append(select(func.count(model.id)).scalar_subquery())
+        columns.append(select(func.max(model.updated_at)).scalar_subquery())
+    for model in (SubcontractedServiceComment, SupplierContact):
+        columns.append(select(func.count(model.id)).scalar_subquery())
+        columns.append(select(func.max(model.id)).scalar_subquery())
+        # SQLite réutilise le plus grand rowid supprimé : max(id) ne suffit pas.
+        columns.append(select(func.max(model.created_at)).scalar_subquery())
+    return tuple(session.exec(select(*columns)).one())
+
+
 def get_subcontracted_service(
     session: Session, service_id: int
 ) -> Optional[SubcontractedService]:
@@ -939,6 +1127,20 @@ def get_subcontracted_service(
     return session.exec(stmt).one_or_none()
 
 
+def get_subcontracted_service_with_client(
+    session: Session, service_id: int, client_id: int
+) -> Tuple[Optional[SubcontractedService], Optional[Client]]:
+    stmt = (
+        select(SubcontractedService, Client)
+        .outerjoin(Client, Client.id == client_id)
+        .where(SubcontractedService.id == service_id)
+    )
+    row = session.exec(stmt).first()
+    if row is None:
+        return None, None
+    return row[0], row[1]
+
+
 def list_subcontracted_service_comments(
     session: Session, service_id: int
 ) -> List[SubcontractedServiceComment]:
@@ -1035,7 +1237,7 @@ def _normalize_order_week(value: Optional[str]) -> Optional[str]:
 def _parse_week_number(value: Optional[str]) -> Optional[int]:
     if not value:
         return None
-    match = re.search(r"(\d{1,2})", value)
+    match = WEEK_NUMBER_RE.search(value)
     if not match:
         return None
     week_number = int(match.group(1))
@@ -1051,7 +1253,7 @@ def _normalize_filter_dimensions(
     if not dimensions:
         return None
 
-    numbers = re.findall(r"\d+(?:[.,]\d+)?", dimensions)
+    numbers = DIMENSION_NUMBER_RE.findall(dimensions)
     if format_type == "cousus_sur_fil":
         if len(numbers) >= 2:
             return f"{numbers[0]} x {numbers[1]}"
@@ -1087,7 +1289,7 @@ def list_filter_lines(
     return session.exec(stmt).all()
 
 
-def create_filter_line(session: Session, data: FilterLineCreate) -> FilterLine:
+def _build_filter_line(data: FilterLineCreate) -> FilterLine:
     payload = data.model_dump()
     payload["order_week"] = _normalize_order_week(payload.get("order_week"))
     payload["dimensions"] = _normalize_filter_dimensions(
@@ -1095,14 +1297,25 @@ def create_filter_line(session: Session, data: FilterLineCreate) -> FilterLine:
     )
     if payload.get("format_type") != "poche":
         payload["pocket_count"] = None
+    return FilterLine(**payload)
+
 
-    record = FilterLine(**payload)
+def create_filter_line(session: Session, data: FilterLineCreate) -> FilterLine:
+    record = _build_filter_line(data)
     session.add(record)
     session.commit()
     session.refresh(record)
     return record
 
 
+def bulk_create_filter_lines(
+    session: Session, items: Sequence[FilterLineCreate]
+) -> int:
+    session.add_all(_build_filter_line(data) for data in items)
+    session.flush()
+    return len(items)
+
+
 def delete_filter_line(session: Session, line_id: int) -> bool:
     record = session.get(FilterLine, line_id)
     if not record:
@@ -1224,17 +1437,26 @@ def list_belt_lines(session: Session, q: Optional[str] = None) -> List[BeltLine]
     return session.exec(stmt).all()
 
 
-def create_belt_line(session: Session, data: BeltLineCreate) -> BeltLine:
+def _build_belt_line(data: BeltLineCreate) -> BeltLine:
     payload = data.model_dump()
     payload["order_week"] = _normalize_order_week(payload.get("order_week"))
+    return BeltLine(**payload)
 
-    record = BeltLine(**payload)
+
+def create_belt_line(session: Session, data: BeltLineCreate) -> BeltLine:
+    record = _build_belt_line(data)
     session.add(record)
     session.commit()
     session.refresh(record)
     return record
 
 
+def bulk_create_belt_lines(session: Session, items: Sequence[BeltLineCreate]) -> int:
+    session.add_all(_build_belt_line(data) for data in items)
+    session.flush()
+    return len(items)
+
+
 def bulk_assign_filter_lines_client(
     session: Session, line_ids: Sequence[int], client_id: Optional[int]
 ) -> int:
@@ -1475,15 +1697,49 @@ def touch_user_activity(session: Session, user: User) -> User:
 def get_login_history_for_users(
     session: Session, user_ids: List[int], *, limit: int = 5
 ) -> Dict[int, List[UserLoginEvent]]:
-    history: Dict[int, List[UserLoginEvent]] = {}
+    history: Dict[int, List[UserLoginEvent]] = {user_id: [] for user_id in user_ids}
     if not user_ids:
         return history
-    for user_id in user_ids:
-        stmt = (
-            select(UserLoginEvent)
-            .where(UserLoginEvent.user_id == user_id)
-            .order_by(UserLoginEvent.occurred_at.desc())
-            .limit(limit)
+    ranked = (
+        select(
+            UserLoginEvent.id.label("event_id"),
+            func.row_number()
+            .over(
+                partition_by=UserLoginEvent.user_id,
+                order_by=(UserLoginEvent.occurred_at.desc(), UserLoginEvent.id.desc()),
+            )
+            .label("rank"),
         )
-        history[user_id] = session.exec(stmt).all()
+        .where(UserLoginEvent.user_id.in_(user_ids))
+        .subquery()
+    )
+    stmt = (
+        select(UserLoginEvent)
+        .join(ranked, ranked.c.event_id == UserLoginEvent.id)
+        .where(ranked.c.rank <= limit)
+        .order_by(UserLoginEvent.occurred_at.desc(), UserLoginEvent.id.desc())
+    )
+    for event in session.exec(stmt):
+        history[event.user_id].append(event)
     return history
+
+
+def store_import_report(session: Session, report_id: str, report: Dict[str, Any]) -> None:
+    session.exec(
+        delete(ImportReport).where(
+            ImportReport.created_at < datetime.utcnow() - IMPORT_REPORT_TTL
+        )
+    )
+    session.add(ImportReport(id=report_id, payload=json.dumps(report)))
+    session.commit()
+
+
+def pop_import_report(session: Session, report_id: str) -> Optional[Dict[str, Any]]:
+    report = session.get(ImportReport, report_id)
+    if not report:
+        return None
+    session.delete(report)
+    session.commit()
+    if report.created_at < datetime.utcnow() - IMPORT_REPORT_TTL:
+        return None
+    return json.loads(report.payload)
@@ -1,4 +1,8 @@
-from sqlalchemy import func
+import os
+from datetime import datetime
+
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import OperationalError
 from sqlmodel import SQLModel, create_engine, Session, select
 
@@ -10,9 +14,20 @@ from models import (
     Supplier,
     SupplierCategory,
     SupplierContact,
+    WorkloadPlanState,
+    WORKLOAD_PLAN_STATE_ID,
 )
 
-engine = create_engine("sqlite:///./crm.db", connect_args={"check_same_thread": False})
+DB_POOL_SIZE = int(os.environ.get("CRM_DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.environ.get("CRM_DB_MAX_OVERFLOW", "40"))
+
+engine = create_engine(
+    "sqlite:///./crm.db",
+    connect_args={"check_same_thread": False},
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_use_lifo=True,
+)
 
 
 def _rebuild_filterline_table(conn, filter_cols):
@@ -250,6 +265,19 @@ def init_db():
             conn.exec_driver_sql(
                 "ALTER TABLE suppliercontact ADD COLUMN description VARCHAR"
             )
+        for table in (
+            "entreprise",
+            "client",
+            "supplier",
+            "prestationdefinition",
+            "subcontractedservice",
+        ):
+            table_cols = {
+                row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info('{table}')")
+            }
+            if "updated_at" not in table_cols:
+                conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN updated_at DATETIME")
+                conn.exec_driver_sql(f"UPDATE {table} SET updated_at = created_at")
     with Session(engine) as session:
         clients_without = session.exec(
             select(Client).where(Client.entreprise_id.is_(None))
@@ -314,6 +342,18 @@ def init_db():
             for label in sorted(existing_categories):
                 session.add(SupplierCategory(label=label))
             session.commit()
+        # Ligne unique d'état du plan de charge, à identifiant fixe.
+        session.exec(
+            delete(WorkloadPlanState).where(
+                WorkloadPlanState.id != WORKLOAD_PLAN_STATE_ID
+            )
+        )
+        session.exec(
+            sqlite_insert(WorkloadPlanState)
+            .values(id=WORKLOAD_PLAN_STATE_ID, version=0, created_at=datetime.utcnow())
+            .on_conflict_do_nothing(index_elements=["id"])
+        )
+        session.commit()
     SQLModel.metadata.create_all(engine)
 
 def get_session():
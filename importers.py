@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
+from functools import lru_cache
 from io import BytesIO
-from typing import Dict, List, Optional, Tuple, Union
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
 import unicodedata
 import re
 
@@ -105,16 +107,22 @@ STATUS_ALIASES = {
     "0": "inactif",
 }
 
-DEPANNAGE_CHOICES = {
-    "refacturable",
-    "non_refacturable",
-}
+STATUS_CHOICES = frozenset(STATUS_ALIASES.values())
 
-ASTREINTE_CHOICES = {
-    "incluse_non_refacturable",
-    "incluse_refacturable",
-    "pas_d_astreinte",
-}
+DEPANNAGE_CHOICES = frozenset(
+    {
+        "refacturable",
+        "non_refacturable",
+    }
+)
+
+ASTREINTE_CHOICES = frozenset(
+    {
+        "incluse_non_refacturable",
+        "incluse_refacturable",
+        "pas_d_astreinte",
+    }
+)
 
 FREQUENCY_UNIT_ALIASES = {
     "mois": "months",
@@ -262,6 +270,7 @@ WORKLOAD_STATE_ALIASES = {
 }
 
 
+@lru_cache(maxsize=1024)
 def _normalize_header(header: Optional[str]) -> str:
     if header is None:
         return ""
@@ -289,6 +298,7 @@ def _coerce_value(value):
 
 
 CONTACT_HEADER_RE = re.compile(r"contact_?(\d+)_([a-z0-9_]+)")
+WORKLOAD_HOURS_RE = re.compile(r"^(\d+(?:[.,]\d+)?)\s*(h|heures|hours|heure|hour)?$")
 
 
 def _resolve_header(header: str) -> HeaderType:
@@ -361,434 +371,474 @@ def _parse_boolean_flag(value: str, row_index: int, field_name: str) -> bool:
     )
 
 
-def parse_clients_excel(content: bytes) -> List[Dict[str, str]]:
-    try:
-        workbook = load_workbook(BytesIO(content), data_only=True)
-    except Exception as exc:  # pragma: no cover - delegated to openpyxl
-        raise ValueError(f"Impossible de lire le fichier Excel: {exc}")
+ExcelSource = Union[bytes, BinaryIO]
 
-    sheet = workbook.active
-    try:
-        header_row = next(sheet.iter_rows(max_row=1))
-    except StopIteration:
-        raise ValueError("Le fichier ne contient aucune donnée.")
-
-    headers: List[HeaderType] = [
-        _resolve_header(_normalize_header(cell.value)) for cell in header_row
-    ]
 
-    if not any(headers):
-        raise ValueError("Le fichier ne contient pas d'en-têtes valides.")
-
-    missing = EXPECTED_FIELDS - {
-        header for header in headers if isinstance(header, str) and header
-    }
-    if missing:
-        raise ValueError(
-            "Colonnes obligatoires manquantes: " + ", ".join(sorted(missing))
+def _load_workbook(source: ExcelSource):
+    if isinstance(source, (bytes, bytearray)):
+        source = BytesIO(source)
+    else:
+        source.seek(0)
+    try:
+        return load_workbook(
+            source, read_only=True, data_only=True, keep_links=False
         )
+    except Exception as exc:  # pragma: no cover - delegated to openpyxl
+        raise ValueError(f"Impossible de lire le fichier Excel: {exc}")
 
-    rows: List[Dict[str, str]] = []
-    for row_index, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2):
-        record: Dict[str, str] = {"__row__": row_index}
-        empty = True
-        for idx, raw_value in enumerate(row):
-            header = headers[idx] if idx < len(headers) else ""
-            if not header:
-                continue
-            value = _coerce_value(raw_value)
-            if value is None:
-                continue
-            empty = False
-            if isinstance(header, tuple):
-                _, contact_index, contact_field = header
-                contact_bucket = record.setdefault("__contacts__", {})
-                contact_data = contact_bucket.setdefault(contact_index, {})
-                contact_data[contact_field] = value
-                continue
-
-            key = header
-            if key == "status":
-                normalized = _normalize_header(value)
-                record[key] = STATUS_ALIASES.get(normalized, normalized or None)
-            elif key == "depannage":
-                normalized = _normalize_header(value)
-                if normalized and normalized not in DEPANNAGE_CHOICES:
-                    raise ValueError(
-                        f"Ligne {row_index}: valeur de dépannage invalide '{value}'."
-                    )
-                if normalized:
-                    record[key] = normalized
-            elif key == "astreinte":
-                normalized = _normalize_header(value)
-                if normalized and normalized not in ASTREINTE_CHOICES:
-                    raise ValueError(
-                        f"Ligne {row_index}: valeur d'astreinte invalide '{value}'."
-                    )
-                if normalized:
-                    record[key] = normalized
-            else:
-                record[key] = value
 
-        if empty:
-            continue
+@contextmanager
+def _open_workbook(source: ExcelSource):
+    workbook = _load_workbook(source)
+    try:
+        yield workbook
+    finally:
+        workbook.close()
+
+
+def _iter_sheet_rows(sheet, **kwargs) -> Iterator[tuple]:
+    # En lecture seule, le XML des feuilles n'est analysé qu'à l'itération.
+    rows = sheet.iter_rows(values_only=True, **kwargs)
+    while True:
+        try:
+            row = next(rows)
+        except StopIteration:
+            return
+        except Exception as exc:
+            raise ValueError(f"Impossible de lire le fichier Excel: {exc}") from exc
+        yield row
+
+
+def parse_clients_excel(source: ExcelSource) -> List[Dict[str, str]]:
+    with _open_workbook(source) as workbook:
+        sheet = workbook.active
+        try:
+            header_row = next(_iter_sheet_rows(sheet, max_row=1))
+        except StopIteration:
+            raise ValueError("Le fichier ne contient aucune donnée.")
+
+        headers: List[HeaderType] = [
+            _resolve_header(_normalize_header(value)) for value in header_row
+        ]
 
-        missing_fields = [field for field in EXPECTED_FIELDS if not record.get(field)]
-        if missing_fields:
-            raise ValueError(
-                f"Ligne {row_index}: valeurs manquantes pour {', '.join(missing_fields)}"
-            )
+        if not any(headers):
+            raise ValueError("Le fichier ne contient pas d'en-têtes valides.")
 
-        if record.get("status") and record["status"] not in STATUS_ALIASES.values():
+        missing = EXPECTED_FIELDS - {
+            header for header in headers if isinstance(header, str) and header
+        }
+        if missing:
             raise ValueError(
-                f"Ligne {row_index}: statut inconnu '{record['status']}'. Valeurs acceptées: actif, inactif."
+                "Colonnes obligatoires manquantes: " + ", ".join(sorted(missing))
             )
 
-        contacts_map = record.pop("__contacts__", {})
-        contacts: List[Dict[str, str]] = []
-        for order, data in sorted(contacts_map.items()):
-            if not data.get("name"):
-                if any(data.get(field) for field in ("email", "phone")):
-                    raise ValueError(
-                        f"Ligne {row_index}: le contact {order} doit avoir un nom."
-                    )
+        rows: List[Dict[str, str]] = []
+        for row_index, row in enumerate(_iter_sheet_rows(sheet, min_row=2), start=2):
+            record: Dict[str, str] = {"__row__": row_index}
+            empty = True
+            for idx, raw_value in enumerate(row):
+                header = headers[idx] if idx < len(headers) else ""
+                if not header:
+                    continue
+                value = _coerce_value(raw_value)
+                if value is None:
+                    continue
+                empty = False
+                if isinstance(header, tuple):
+                    _, contact_index, contact_field = header
+                    contact_bucket = record.setdefault("__contacts__", {})
+                    contact_data = contact_bucket.setdefault(contact_index, {})
+                    contact_data[contact_field] = value
+                    continue
+
+                key = header
+                if key == "status":
+                    normalized = _normalize_header(value)
+                    record[key] = STATUS_ALIASES.get(normalized, normalized or None)
+                elif key == "depannage":
+                    normalized = _normalize_header(value)
+                    if normalized and normalized not in DEPANNAGE_CHOICES:
+                        raise ValueError(
+                            f"Ligne {row_index}: valeur de dépannage invalide '{value}'."
+                        )
+                    if normalized:
+                        record[key] = normalized
+                elif key == "astreinte":
+                    normalized = _normalize_header(value)
+                    if normalized and normalized not in ASTREINTE_CHOICES:
+                        raise ValueError(
+                            f"Ligne {row_index}: valeur d'astreinte invalide '{value}'."
+                        )
+                    if normalized:
+                        record[key] = normalized
+                else:
+                    record[key] = value
+
+            if empty:
                 continue
-            contacts.append(data)
-
-        if contacts:
-            record["contacts"] = contacts
-
-        rows.append(record)
 
-    return rows
+            missing_fields = [field for field in EXPECTED_FIELDS if not record.get(field)]
+            if missing_fields:
+                raise ValueError(
+                    f"Ligne {row_index}: valeurs manquantes pour {', '.join(missing_fields)}"
+                )
 
+            if record.get("status") and record["status"] not in STATUS_CHOICES:
+                raise ValueError(
+                    f"Ligne {row_index}: statut inconnu '{record['status']}'. Valeurs acceptées: actif, inactif."
+                )
 
-def parse_suppliers_excel(content: bytes) -> List[Dict[str, str]]:
-    try:
-        workbook = load_workbook(BytesIO(content), data_only=True)
-    except Exception as exc:  # pragma: no cover - delegated to openpyxl
-        raise ValueError(f"Impossible de lire le fichier Excel: {exc}")
+            contacts_map = record.pop("__contacts__", {})
+            contacts: List[Dict[str, str]] = []
+            for order, data in sorted(contacts_map.items()):
+                if not data.get("name"):
+                    if any(data.get(field) for field in ("email", "phone")):
+                        raise ValueError(
+                            f"Ligne {row_index}: le contact {order} doit avoir un nom."
+                        )
+                    continue
+                contacts.append(data)
 
-    sheet = workbook.active
-    try:
-        header_row = next(sheet.iter_rows(max_row=1))
-    except StopIteration:
-        raise ValueError("Le fichier ne contient aucune donnée.")
+            if contacts:
+                record["contacts"] = contacts
 
-    headers: List[HeaderType] = [
-        _resolve_supplier_header(_normalize_header(cell.value)) for cell in header_row
-    ]
+            rows.append(record)
 
-    if not any(headers):
-        raise ValueError("Le fichier ne contient pas d'en-têtes valides.")
+        return rows
 
-    missing = SUPPLIER_EXPECTED_FIELDS - {
-        header for header in headers if isinstance(header, str) and header
-    }
-    if missing:
-        raise ValueError(
-            "Colonnes obligatoires manquantes: " + ", ".join(sorted(missing))
-        )
 
-    rows: List[Dict[str, str]] = []
-    for row_index, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2):
-        record: Dict[str, str] = {"__row__": row_index}
-        empty = True
-        for idx, raw_value in enumerate(row):
-            header = headers[idx] if idx < len(headers) else ""
-            if not header:
-                continue
-            value = _coerce_value(raw_value)
-            if value is None:
-                continue
-            empty = False
-            if isinstance(header, tuple):
-                _, contact_index, contact_field = header
-                contact_bucket = record.setdefault("__contacts__", {})
-                contact_data = contact_bucket.setdefault(contact_index, {})
-                contact_data[contact_field] = value
-                continue
+def parse_suppliers_excel(source: ExcelSource) -> List[Dict[str, str]]:
+    with _open_workbook(source) as workbook:
+        sheet = workbook.active
+        try:
+            header_row = next(_iter_sheet_rows(sheet, max_row=1))
+        except StopIteration:
+            raise ValueError("Le fichier ne contient aucune donnée.")
 
-            key = header
-            if key == "supplier_type":
-                normalized = _normalize_header(value)
-                record[key] = SUPPLIER_TYPE_ALIASES.get(normalized)
-                if value and not record[key]:
-                    raise ValueError(
-                        f"Ligne {row_index}: type de fournisseur inconnu '{value}'."
-                    )
-            else:
-                record[key] = value
+        headers: List[HeaderType] = [
+            _resolve_supplier_header(_normalize_header(value)) for value in header_row
+        ]
 
-        if empty:
-            continue
+        if not any(headers):
+            raise ValueError("Le fichier ne contient pas d'en-têtes valides.")
 
-        missing_fields = [
-            field for field in SUPPLIER_EXPECTED_FIELDS if not record.get(field)
-        ]
-        if missing_fields:
+        missing = SUPPLIER_EXPECTED_FIELDS - {
+            header for header in headers if isinstance(header, str) and header
+        }
+        if missing:
             raise ValueError(
-                f"Ligne {row_index}: valeurs manquantes pour {', '.join(missing_fields)}"
+                "Colonnes obligatoires manquantes: " + ", ".join(sorted(missing))
             )
 
-        contacts_map = record.pop("__contacts__", {})
-        contacts: List[Dict[str, str]] = []
-        for order, data in sorted(contacts_map.items()):
-            if not data.get("name"):
-                if any(data.get(field) for field in ("email", "phone")):
-                    raise ValueError(
-                        f"Ligne {row_index}: le contact {order} doit avoir un nom."
-                    )
+        rows: List[Dict[str, str]] = []
+        for row_index, row in enumerate(_iter_sheet_rows(sheet, min_row=2), start=2):
+            record: Dict[str, str] = {"__row__": row_index}
+            empty = True
+            for idx, raw_value in enumerate(row):
+                header = headers[idx] if idx < len(headers) else ""
+                if not header:
+                    continue
+                value = _coerce_value(raw_value)
+                if value is None:
+                    continue
+                empty = False
+                if isinstance(header, tuple):
+                    _, contact_index, contact_field = header
+                    contact_bucket = record.setdefault("__contacts__", {})
+                    contact_data = contact_bucket.setdefault(contact_index, {})
+                    contact_data[contact_field] = value
+                    continue
+
+                key = header
+                if key == "supplier_type":
+                    normalized = _normalize_header(value)
+                    record[key] = SUPPLIER_TYPE_ALIASES.get(normalized)
+                    if value and not record[key]:
+                        raise ValueError(
+                            f"Ligne {row_index}: type de fournisseur inconnu '{value}'."
+                        )
+                else:
+                    record[key] = value
+
+            if empty:
                 continue
-            contacts.append(data)
 
-        if contacts:
-            record["contacts"] = contacts
+            missing_fields = [
+                field for field in SUPPLIER_EXPECTED_FIELDS if not record.get(field)
+            ]
+            if missing_fields:
+                raise ValueError(
+                    f"Ligne {row_index}: valeurs manquantes pour {', '.join(missing_fields)}"
+                )
 
-        rows.append(record)
+            contacts_map = record.pop("__contacts__", {})
+            contacts: List[Dict[str, str]] = []
+            for order, data in sorted(contacts_map.items()):
+                if not data.get("name"):
+                    if any(data.get(field) for field in ("email", "phone")):
+                        raise ValueError(
+                            f"Ligne {row_index}: le contact {order} doit avoir un nom."
+                        )
+                    continue
+                contacts.append(data)
 
-    return rows
+            if contacts:
+                record["contacts"] = contacts
 
+            rows.append(record)
 
-def parse_prestations_excel(content: bytes) -> List[Dict[str, Union[str, int]]]:
-    try:
-        workbook = load_workbook(BytesIO(content), data_only=True)
-    except Exception as exc:
-        raise ValueError(f"Impossible de lire le fichier Excel: {exc}")
+        return rows
 
-    sheet = workbook.active
-    try:
-        header_row = next(sheet.iter_rows(max_row=1))
-    except StopIteration:
-        raise ValueError("Le fichier ne contient aucune donnée.")
-
-    headers = [
-        _resolve_prestation_header(_normalize_header(cell.value)) for cell in header_row
-    ]
-
-    if not any(headers):
-        raise ValueError("Le fichier ne contient pas d'en-têtes valides.")
-
-    rows: List[Dict[str, Union[str, int]]] = []
-    for row_index, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2):
-        record: Dict[str, Union[str, int]] = {"__row__": row_index}
-        empty = True
-        for idx, raw_value in enumerate(row):
-            header = headers[idx] if idx < len(headers) else ""
-            if not header:
-                continue
-            value = _coerce_value(raw_value)
-            if value is None:
-                continue
-            empty = False
-            if header in {"frequency", "status"}:
-                record[header] = _normalize_header(value)
-            elif header == "frequency_unit":
-                normalized_unit = _normalize_header(value)
-                record[header] = FREQUENCY_UNIT_ALIASES.get(
-                    normalized_unit, normalized_unit
-                )
-            elif header in {"company_name", "client_name", "prestation_label", "prestation"}:
-                record[header] = value.strip()
-            elif header == "client_id":
-                record[header] = _parse_positive_int(value, row_index, "identifiant client")
-            elif header == "frequency_interval":
-                record[header] = _parse_positive_int(
-                    value, row_index, "intervalle de fréquence"
-                )
-            else:
-                record[header] = value
 
-        if empty:
-            continue
+def parse_prestations_excel(source: ExcelSource) -> List[Dict[str, Union[str, int]]]:
+    with _open_workbook(source) as workbook:
+        sheet = workbook.active
+        try:
+            header_row = next(_iter_sheet_rows(sheet, max_row=1))
+        except StopIteration:
+            raise ValueError("Le fichier ne contient aucune donnée.")
 
-        if not record.get("prestation") and not record.get("prestation_label"):
-            raise ValueError(
-                f"Ligne {row_index}: veuillez renseigner la colonne prestation ou libellé."
-            )
+        headers = [
+            _resolve_prestation_header(_normalize_header(value)) for value in header_row
+        ]
 
-        has_client_reference = any(
-            record.get(field)
-            for field in ("client_id", "company_name", "client_name")
-        )
-        if not has_client_reference:
-            raise ValueError(
-                "Ligne {row_index}: renseignez le nom d'entreprise, le contact client ou l'identifiant client."
-                .format(row_index=row_index)
+        if not any(headers):
+            raise ValueError("Le fichier ne contient pas d'en-têtes valides.")
+
+        rows: List[Dict[str, Union[str, int]]] = []
+        for row_index, row in enumerate(_iter_sheet_rows(sheet, min_row=2), start=2):
+            record: Dict[str, Union[str, int]] = {"__row__": row_index}
+            empty = True
+            for idx, raw_value in enumerate(row):
+                header = headers[idx] if idx < len(headers) else ""
+                if not header:
+                    continue
+                value = _coerce_value(raw_value)
+                if value is None:
+                    continue
+                empty = False
+                if header in {"frequency", "status"}:
+                    record[header] = _normalize_header(value)
+                elif header == "frequency_unit":
+                    normalized_unit = _normalize_header(value)
+                    record[header] = FREQUENCY_UNIT_ALIASES.get(
+                        normalized_unit, normalized_unit
+                    )
+                elif header in {"order_week", "realization_week"}:
+                    record[header] = value.upper()
+                elif header == "client_id":
+                    record[header] = _parse_positive_int(
+                        value, row_index, "identifiant client"
+                    )
+                elif header == "frequency_interval":
+                    record[header] = _parse_positive_int(
+                        value, row_index, "intervalle de fréquence"
+                    )
+                else:
+                    record[header] = value
+
+            if empty:
+                continue
+
+            if not record.get("prestation") and not record.get("prestation_label"):
+                raise ValueError(
+                    f"Ligne {row_index}: veuillez renseigner la colonne prestation ou libellé."
+                )
+
+            has_client_reference = any(
+                record.get(field)
+                for field in ("client_id", "company_name", "client_name")
             )
+            if not has_client_reference:
+                raise ValueError(
+                    "Ligne {row_index}: renseignez le nom d'entreprise, le contact client ou l'identifiant client."
+                    .format(row_index=row_index)
+                )
 
-        rows.append(record)
+            rows.append(record)
 
-    return rows
+        return rows
 
 
-def parse_filter_lines_excel(content: bytes) -> List[Dict[str, Union[str, int]]]:
+def parse_filter_lines_excel(source: ExcelSource) -> Iterator[Dict[str, Union[str, int]]]:
+    workbook = _load_workbook(source)
     try:
-        workbook = load_workbook(BytesIO(content), data_only=True)
-    except Exception as exc:
-        raise ValueError(f"Impossible de lire le fichier Excel: {exc}")
+        sheet = workbook.active
+        try:
+            header_row = next(_iter_sheet_rows(sheet, max_row=1))
+        except StopIteration:
+            raise ValueError("Le fichier ne contient aucune donnée.")
+
+        headers = [
+            _resolve_filter_header(_normalize_header(value)) for value in header_row
+        ]
 
-    sheet = workbook.active
-    try:
-        header_row = next(sheet.iter_rows(max_row=1))
-    except StopIteration:
-        raise ValueError("Le fichier ne contient aucune donnée.")
+        if not any(headers):
+            raise ValueError("Le fichier ne contient pas d'en-têtes valides.")
 
-    headers = [
-        _resolve_filter_header(_normalize_header(cell.value)) for cell in header_row
-    ]
+        missing = FILTER_EXPECTED_FIELDS - {header for header in headers if header}
+        if missing:
+            raise ValueError(
+                "Colonnes obligatoires manquantes: " + ", ".join(sorted(missing))
+            )
+    except BaseException:
+        workbook.close()
+        raise
 
-    if not any(headers):
-        raise ValueError("Le fichier ne contient pas d'en-têtes valides.")
+    return _iter_filter_line_records(workbook, sheet, headers)
 
-    missing = FILTER_EXPECTED_FIELDS - {header for header in headers if header}
-    if missing:
-        raise ValueError(
-            "Colonnes obligatoires manquantes: " + ", ".join(sorted(missing))
-        )
 
-    rows: List[Dict[str, Union[str, int]]] = []
-    for row_index, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2):
-        record: Dict[str, Union[str, int]] = {"__row__": row_index}
-        empty = True
-        for idx, raw_value in enumerate(row):
-            header = headers[idx] if idx < len(headers) else ""
-            if not header:
-                continue
-            value = _coerce_value(raw_value)
-            if value is None:
-                continue
-            empty = False
-            if header == "format_type":
-                normalized = _normalize_header(value)
-                resolved = FILTER_FORMAT_LOOKUP.get(normalized)
-                if not resolved:
-                    raise ValueError(
-                        f"Ligne {row_index}: format de filtre inconnu '{value}'."
+def _iter_filter_line_records(
+    workbook, sheet, headers: List[str]
+) -> Iterator[Dict[str, Union[str, int]]]:
+    try:
+        for row_index, row in enumerate(_iter_sheet_rows(sheet, min_row=2), start=2):
+            record: Dict[str, Union[str, int]] = {"__row__": row_index}
+            empty = True
+            for idx, raw_value in enumerate(row):
+                header = headers[idx] if idx < len(headers) else ""
+                if not header:
+                    continue
+                value = _coerce_value(raw_value)
+                if value is None:
+                    continue
+                empty = False
+                if header == "format_type":
+                    normalized = _normalize_header(value)
+                    resolved = FILTER_FORMAT_LOOKUP.get(normalized)
+                    if not resolved:
+                        raise ValueError(
+                            f"Ligne {row_index}: format de filtre inconnu '{value}'."
+                        )
+                    record[header] = resolved
+                elif header == "quantity":
+                    record[header] = _parse_positive_int(value, row_index, "quantité")
+                elif header == "pocket_count":
+                    record[header] = _parse_positive_int(value, row_index, "nombre de poches")
+                elif header == "order_week":
+                    record[header] = value.upper()
+                elif header == "included_in_contract":
+                    record[header] = _parse_boolean_flag(
+                        value, row_index, "inclus au contrat"
                     )
-                record[header] = resolved
-            elif header == "quantity":
-                record[header] = _parse_positive_int(value, row_index, "quantité")
-            elif header == "pocket_count":
-                record[header] = _parse_positive_int(value, row_index, "nombre de poches")
-            elif header == "order_week":
-                record[header] = value.strip().upper()
-            elif header == "included_in_contract":
-                record[header] = _parse_boolean_flag(
-                    value, row_index, "inclus au contrat"
-                )
-            elif header == "ordered":
-                record[header] = _parse_boolean_flag(
-                    value, row_index, "commandé"
-                )
-            else:
-                record[header] = value
-
-        if empty:
-            continue
-
-        missing_fields = [
-            field for field in FILTER_EXPECTED_FIELDS if not record.get(field)
-        ]
-        if missing_fields:
-            raise ValueError(
-                "Ligne {row_index}: champ(s) obligatoire(s) manquant(s): "
-                + ", ".join(sorted(missing_fields))
-            )
+                elif header == "ordered":
+                    record[header] = _parse_boolean_flag(
+                        value, row_index, "commandé"
+                    )
+                else:
+                    record[header] = value
 
-        if "quantity" not in record:
-            record["quantity"] = 1
+            if empty:
+                continue
 
-        if "included_in_contract" not in record:
-            record["included_in_contract"] = False
+            missing_fields = [
+                field for field in FILTER_EXPECTED_FIELDS if not record.get(field)
+            ]
+            if missing_fields:
+                raise ValueError(
+                    "Ligne {row_index}: champ(s) obligatoire(s) manquant(s): "
+                    + ", ".join(sorted(missing_fields))
+                )
 
-        if "ordered" not in record:
-            record["ordered"] = False
+            if "quantity" not in record:
+                record["quantity"] = 1
 
-        if record.get("format_type") != "poche":
-            record.pop("pocket_count", None)
+            if "included_in_contract" not in record:
+                record["included_in_contract"] = False
 
-        rows.append(record)
+            if "ordered" not in record:
+                record["ordered"] = False
 
-    return rows
+            if record.get("format_type") != "poche":
+                record.pop("pocket_count", None)
 
+            yield record
+    finally:
+        workbook.close()
 
-def parse_belt_lines_excel(content: bytes) -> List[Dict[str, Union[str, int]]]:
-    try:
-        workbook = load_workbook(BytesIO(content), data_only=True)
-    except Exception as exc:
-        raise ValueError(f"Impossible de lire le fichier Excel: {exc}")
 
-    sheet = workbook.active
+def parse_belt_lines_excel(source: ExcelSource) -> Iterator[Dict[str, Union[str, int]]]:
+    workbook = _load_workbook(source)
     try:
-        header_row = next(sheet.iter_rows(max_row=1))
-    except StopIteration:
-        raise ValueError("Le fichier ne contient aucune donnée.")
+        sheet = workbook.active
+        try:
+            header_row = next(_iter_sheet_rows(sheet, max_row=1))
+        except StopIteration:
+            raise ValueError("Le fichier ne contient aucune donnée.")
+
+        headers = [
+            _resolve_belt_header(_normalize_header(value)) for value in header_row
+        ]
 
-    headers = [
-        _resolve_belt_header(_normalize_header(cell.value)) for cell in header_row
-    ]
+        if not any(headers):
+            raise ValueError("Le fichier ne contient pas d'en-têtes valides.")
 
-    if not any(headers):
-        raise ValueError("Le fichier ne contient pas d'en-têtes valides.")
+        missing = BELT_EXPECTED_FIELDS - {header for header in headers if header}
+        if missing:
+            raise ValueError(
+                "Colonnes obligatoires manquantes: " + ", ".join(sorted(missing))
+            )
+    except BaseException:
+        workbook.close()
+        raise
 
-    missing = BELT_EXPECTED_FIELDS - {header for header in headers if header}
-    if missing:
-        raise ValueError(
-            "Colonnes obligatoires manquantes: " + ", ".join(sorted(missing))
-        )
+    return _iter_belt_line_records(workbook, sheet, headers)
 
-    rows: List[Dict[str, Union[str, int]]] = []
-    for row_index, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2):
-        record: Dict[str, Union[str, int]] = {"__row__": row_index}
-        empty = True
-        for idx, raw_value in enumerate(row):
-            header = headers[idx] if idx < len(headers) else ""
-            if not header:
-                continue
-            value = _coerce_value(raw_value)
-            if value is None:
-                continue
-            empty = False
-            if header == "quantity":
-                record[header] = _parse_positive_int(value, row_index, "quantité")
-            elif header == "order_week":
-                record[header] = value.strip().upper()
-            elif header == "included_in_contract":
-                record[header] = _parse_boolean_flag(
-                    value, row_index, "inclus au contrat"
-                )
-            elif header == "ordered":
-                record[header] = _parse_boolean_flag(
-                    value, row_index, "commandé"
-                )
-            else:
-                record[header] = value
 
-        if empty:
-            continue
+def _iter_belt_line_records(
+    workbook, sheet, headers: List[str]
+) -> Iterator[Dict[str, Union[str, int]]]:
+    try:
+        for row_index, row in enumerate(_iter_sheet_rows(sheet, min_row=2), start=2):
+            record: Dict[str, Union[str, int]] = {"__row__": row_index}
+            empty = True
+            for idx, raw_value in enumerate(row):
+                header = headers[idx] if idx < len(headers) else ""
+                if not header:
+                    continue
+                value = _coerce_value(raw_value)
+                if value is None:
+                    continue
+                empty = False
+                if header == "quantity":
+                    record[header] = _parse_positive_int(value, row_index, "quantité")
+                elif header == "order_week":
+                    record[header] = value.upper()
+                elif header == "included_in_contract":
+                    record[header] = _parse_boolean_flag(
+                        value, row_index, "inclus au contrat"
+                    )
+                elif header == "ordered":
+                    record[header] = _parse_boolean_flag(
+                        value, row_index, "commandé"
+                    )
+                else:
+                    record[header] = value
 
-        missing_fields = [
-            field for field in BELT_EXPECTED_FIELDS if not record.get(field)
-        ]
-        if missing_fields:
-            raise ValueError(
-                "Ligne {row_index}: champ(s) obligatoire(s) manquant(s): "
-                + ", ".join(sorted(missing_fields))
-            )
+            if empty:
+                continue
 
-        if "quantity" not in record:
-            record["quantity"] = 1
+            missing_fields = [
+                field for field in BELT_EXPECTED_FIELDS if not record.get(field)
+            ]
+            if missing_fields:
+                raise ValueError(
+                    "Ligne {row_index}: champ(s) obligatoire(s) manquant(s): "
+                    + ", ".join(sorted(missing_fields))
+                )
 
-        if "included_in_contract" not in record:
-            record["included_in_contract"] = False
+            if "quantity" not in record:
+                record["quantity"] = 1
 
-        if "ordered" not in record:
-            record["ordered"] = False
+            if "included_in_contract" not in record:
+                record["included_in_contract"] = False
 
-        rows.append(record)
+            if "ordered" not in record:
+                record["ordered"] = False
 
-    return rows
+            yield record
+    finally:
+        workbook.close()
 
 
 def _format_hours(value: float) -> str:
@@ -866,7 +916,7 @@ def _normalize_workload_cell_value(
                 return f"ok:{_parse_hours_value(suffix, row_index, column_index)}"
             return state
 
-    numeric_match = re.match(r"^(\d+(?:[.,]\d+)?)\s*(h|heures|hours|heure|hour)?$", lower)
+    numeric_match = WORKLOAD_HOURS_RE.match(lower)
     if numeric_match:
         number = float(numeric_match.group(1).replace(",", "."))
         if number <= 0:
@@ -881,61 +931,61 @@ def _normalize_workload_cell_value(
 
 
 def parse_workload_plan_excel(
-    content: bytes,
+    source: ExcelSource,
 ) -> Tuple[List[str], Dict[str, List[Optional[str]]]]:
-    try:
-        workbook = load_workbook(BytesIO(content), data_only=True)
-    except Exception as exc:
-        raise ValueError(f"Impossible de lire le fichier Excel: {exc}")
-
-    sheet = workbook.active
-    if sheet.max_row < 2:
-        raise ValueError("Le fichier ne contient aucune donnée.")
-
-    sites: List[str] = []
-    cells_map: Dict[str, List[Optional[str]]] = {}
-    seen_sites: set[str] = set()
-
-    for row_index, row in enumerate(
-        sheet.iter_rows(min_row=2, max_col=365, values_only=True), start=2
-    ):
-        if not row:
-            continue
-        row_values = list(row)
-        if not any(
-            (isinstance(value, float) and not math.isnan(value))
-            or isinstance(value, int)
-            or (isinstance(value, str) and value.strip())
-            for value in row_values
+    with _open_workbook(source) as workbook:
+        sheet = workbook.active
+        sites: List[str] = []
+        cells_map: Dict[str, List[Optional[str]]] = {}
+        seen_sites: set[str] = set()
+        normalized_values: Dict[Union[str, int, float], Optional[str]] = {}
+        has_data_rows = False
+
+        for row_index, row in enumerate(
+            _iter_sheet_rows(sheet, min_row=2, max_col=365), start=2
         ):
-            continue
-
-        raw_site = row_values[0] if len(row_values) > 0 else None
-        site_name = _coerce_value(raw_site)
-        if not site_name:
-            raise ValueError(f"Ligne {row_index}: nom de site manquant.")
-        normalized_site = site_name.strip()
-        if normalized_site in seen_sites:
-            raise ValueError(
-                f"Ligne {row_index}: le site '{normalized_site}' est présent plusieurs fois."
-            )
-        seen_sites.add(normalized_site)
-        sites.append(normalized_site)
+            has_data_rows = True
+            if not row:
+                continue
+            row_values = list(row)
+            if not any(
+                (isinstance(value, float) and not math.isnan(value))
+                or isinstance(value, int)
+                or (isinstance(value, str) and value.strip())
+                for value in row_values
+            ):
+                continue
 
-        cells: List[Optional[str]] = [None] * 364
-        for day_index in range(364):
-            raw_value = row_values[day_index + 1] if day_index + 1 < len(row_values) else None
-            try:
+            raw_site = row_values[0] if len(row_values) > 0 else None
+            site_name = _coerce_value(raw_site)
+            if not site_name:
+                raise ValueError(f"Ligne {row_index}: nom de site manquant.")
+            normalized_site = site_name.strip()
+            if normalized_site in seen_sites:
+                raise ValueError(
+                    f"Ligne {row_index}: le site '{normalized_site}' est présent plusieurs fois."
+                )
+            seen_sites.add(normalized_site)
+            sites.append(normalized_site)
+
+            cells: List[Optional[str]] = [None] * 364
+            for day_index, raw_value in enumerate(row_values[1:365]):
+                if raw_value is None:
+                    continue
+                if raw_value in normalized_values:
+                    cells[day_index] = normalized_values[raw_value]
+                    continue
                 normalized_value = _normalize_workload_cell_value(
                     raw_value, row_index, day_index + 2
                 )
-            except ValueError as exc:
-                raise ValueError(str(exc))
-            cells[day_index] = normalized_value
+                normalized_values[raw_value] = normalized_value
+                cells[day_index] = normalized_value
 
-        cells_map[normalized_site] = cells
+            cells_map[normalized_site] = cells
 
-    if not sites:
-        raise ValueError("Aucun site valide trouvé dans le fichier.")
+        if not has_data_rows:
+            raise ValueError("Le fichier ne contient aucune donnée.")
+        if not sites:
+            raise ValueError("Aucun site valide trouvé dans le fichier.")
 
-    return sites, cells_map
+        return sites, cells_map
@@ -8,9 +8,20 @@ from sqlalchemy import (
     Boolean,
     DateTime,
 )
+from pydantic import field_validator
 from sqlmodel import SQLModel, Field, Relationship
 
 
+def _strip_text(value):
+    return value.strip() if isinstance(value, str) else value
+
+
+def _normalize_week(value):
+    if isinstance(value, str):
+        return value.strip().upper() or None
+    return value
+
+
 # =======================
 # TABLE ENTREPRISE
 # =======================
@@ -24,6 +35,10 @@ class EntrepriseBase(SQLModel):
 class Entreprise(EntrepriseBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_column_kwargs={"onupdate": datetime.utcnow},
+    )
     clients: List["Client"] = Relationship(back_populates="entreprise")
 
 
@@ -69,6 +84,10 @@ class ClientBase(SQLModel):
 class Client(ClientBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_column_kwargs={"onupdate": datetime.utcnow},
+    )
     entreprise_id: Optional[int] = Field(
         default=None,
         foreign_key="entreprise.id",
@@ -182,6 +201,10 @@ class SupplierBase(SQLModel):
 class Supplier(SupplierBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_column_kwargs={"onupdate": datetime.utcnow},
+    )
     contacts: List["SupplierContact"] = Relationship(
         back_populates="supplier",
         sa_relationship_kwargs={"cascade": "all, delete-orphan"},
@@ -262,6 +285,10 @@ class PrestationDefinition(PrestationDefinitionBase, table=True):
 
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_column_kwargs={"onupdate": datetime.utcnow},
+    )
 
 
 class PrestationDefinitionCreate(PrestationDefinitionBase):
@@ -312,11 +339,20 @@ class SubcontractedServiceBase(SQLModel):
         default=None, foreign_key="supplier.id", description="Fournisseur lié"
     )
 
+    @field_validator("realization_week", "order_week", mode="before")
+    @classmethod
+    def _normalize_weeks(cls, value):
+        return _normalize_week(value)
+
 
 class SubcontractedService(SubcontractedServiceBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     client_id: int = Field(foreign_key="client.id")
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_column_kwargs={"onupdate": datetime.utcnow},
+    )
     client: Optional[Client] = Relationship(back_populates="subcontractings")
     supplier: Optional[Supplier] = Relationship(back_populates="subcontracted_services")
     comments: List["SubcontractedServiceComment"] = Relationship(
@@ -344,6 +380,11 @@ class SubcontractedServiceUpdate(SQLModel):
     client_id: Optional[int] = None
     supplier_id: Optional[int] = None
 
+    @field_validator("realization_week", "order_week", mode="before")
+    @classmethod
+    def _normalize_weeks(cls, value):
+        return _normalize_week(value)
+
 
 class SubcontractedServiceCommentBase(SQLModel):
     service_id: int = Field(foreign_key="subcontractedservice.id")
@@ -409,6 +450,16 @@ class WorkloadCellUpdate(SQLModel):
     value: Optional[str] = None
 
 
+# Le plan de charge n'a qu'une seule ligne d'état, toujours à cet identifiant.
+WORKLOAD_PLAN_STATE_ID = 1
+
+
+class WorkloadPlanState(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    version: int = Field(default=0, description="Compteur de modifications du plan")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 # =======================
 # TABLE LIGNES FILTRES
 # =======================
@@ -444,6 +495,18 @@ class FilterLineBase(SQLModel):
     )
     ordered: bool = Field(default=False, description="Filtre commandé")
 
+    @field_validator(
+        "site", "equipment", "efficiency", "info_plus", "dimensions", mode="before"
+    )
+    @classmethod
+    def _strip_text_fields(cls, value):
+        return _strip_text(value)
+
+    @field_validator("order_week", mode="before")
+    @classmethod
+    def _normalize_order_week(cls, value):
+        return _normalize_week(value)
+
 
 class FilterLine(FilterLineBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -471,6 +534,18 @@ class FilterLineUpdate(SQLModel):
     client_id: Optional[int] = None
     client_site_id: Optional[int] = None
 
+    @field_validator(
+        "site", "equipment", "efficiency", "info_plus", "dimensions", mode="before"
+    )
+    @classmethod
+    def _strip_text_fields(cls, value):
+        return _strip_text(value)
+
+    @field_validator("order_week", mode="before")
+    @classmethod
+    def _normalize_order_week(cls, value):
+        return _normalize_week(value)
+
 
 # =======================
 # TABLE LIGNES COURROIES
@@ -494,6 +569,16 @@ class BeltLineBase(SQLModel):
     )
     ordered: bool = Field(default=False, description="Courroie commandée")
 
+    @field_validator("site", "equipment", "reference", mode="before")
+    @classmethod
+    def _strip_text_fields(cls, value):
+        return _strip_text(value)
+
+    @field_validator("order_week", mode="before")
+    @classmethod
+    def _normalize_order_week(cls, value):
+        return _normalize_week(value)
+
 
 class BeltLine(BeltLineBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -517,6 +602,16 @@ class BeltLineUpdate(SQLModel):
     client_id: Optional[int] = None
     client_site_id: Optional[int] = None
 
+    @field_validator("site", "equipment", "reference", mode="before")
+    @classmethod
+    def _strip_text_fields(cls, value):
+        return _strip_text(value)
+
+    @field_validator("order_week", mode="before")
+    @classmethod
+    def _normalize_order_week(cls, value):
+        return _normalize_week(value)
+
 
 # =======================
 # TABLE UTILISATEURS
@@ -568,3 +663,14 @@ class UserLoginEvent(SQLModel, table=True):
         description="Horodatage de l'événement",
     )
     user: Optional[User] = Relationship(back_populates="login_events")
+
+
+# =======================
+# TABLE RAPPORTS D'IMPORT
+# =======================
+
+
+class ImportReport(SQLModel, table=True):
+    id: str = Field(primary_key=True, description="Jeton transmis lors de la redirection")
+    payload: str = Field(sa_column=Column("payload", String, nullable=False))
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)